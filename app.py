@@ -1,7 +1,12 @@
 import json
 import os
 import sys
-import gradio as gr
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from functions.summary_store import get_store, import_saved_outputs
+from functions.events import summary_events
 
 # Folder where summary tree structures will be saved.
 EXAMPLE_REPOS_DIR = "../example_repos"
@@ -65,30 +70,186 @@ def load_tree_file(file_name: str) -> (list, dict):
 def get_node_summary(node_key: str, tree_dict: dict) -> str:
     return tree_dict.get(node_key, "Summary not found.")
 
+# -----------------------------
+# Functions Querying the Indexed Summary Store
+# -----------------------------
+# Folders are queried one at a time from the SQLite store written by main.py, instead of
+# loading whole summary_tree_*.json files into memory.
+def list_stored_repos() -> list:
+    return [run["repo"] for run in get_store().list_repos()]
+
+def load_global_summary(repo: str) -> str:
+    if not repo:
+        return "Select a repository."
+    return get_store().get_global_summary(repo) or f"No summary stored for {repo}."
+
+def list_folder_keys(repo: str, prefix: str = "") -> list:
+    if not repo:
+        return []
+    return get_store().list_nodes(repo, prefix or "")
+
+def load_node_summary(repo: str, key: str) -> str:
+    if not repo or not key:
+        return ""
+    return get_store().get_node_summary(repo, key) or "Summary not found."
+
+def search_summaries(query: str, repo: str = None) -> str:
+    """Full-text search over the stored folder summaries, formatted as Markdown."""
+    if not query or not query.strip():
+        return "Enter a search query."
+    try:
+        results = get_store().search(query, repo=repo or None)
+    except sqlite3.OperationalError as e:
+        return f"Invalid search query: {e}"
+    if not results:
+        return "No match."
+    return "\n\n".join(f"**{result['repo']}** `{result['key']}`: {result['snippet']}" for result in results)
+
+# -----------------------------
+# Background Summarization Jobs
+# -----------------------------
+# Summaries requested from the interface run on the job queue's worker threads, so that a
+# request returns at once and the interface keeps answering while repositories are summarized.
+_job_queue = None
+# Gradio runs handlers (and the jobs table polls of every open page) concurrently.
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            from functions.job_queue import JobQueue
+            from functions.utils import run_repo_summary_job
+            _job_queue = JobQueue(run_repo_summary_job)
+        return _job_queue
+
+def submit_summary_job(repo_url: str) -> str:
+    if not repo_url or not repo_url.strip():
+        return "Enter a repository URL."
+    try:
+        job = get_job_queue().submit(repo_url.strip())
+    except Exception as e:
+        return f"Could not resolve {repo_url}: {e}"
+    return f"Job `{job.id}` ({job.status}) for {job.repo_url} at commit `{job.commit[:12]}`."
+
+def list_summary_jobs() -> list:
+    """Rows of the jobs table: one per job, most recent first."""
+    return [list(job.snapshot().values()) for job in get_job_queue().list_jobs()]
+
+def cancel_summary_job(job_id: str) -> str:
+    if get_job_queue().cancel((job_id or "").strip()):
+        return f"Cancellation of job `{job_id}` requested."
+    return f"Job `{job_id}` is unknown or already finished."
+
+def list_job_folders(job_id: str) -> list:
+    """Keys of the folders a job has summarized so far (leaves first)."""
+    job = get_job_queue().get((job_id or "").strip())
+    return list(job.partial) if job else []
+
+def load_job_folder(job_id: str, key: str) -> str:
+    job = get_job_queue().get((job_id or "").strip())
+    if job is None or not key:
+        return ""
+    return job.partial.get(key, "Not summarized yet.")
+
+# Answers being generated by the running jobs, streamed piece by piece (latest calls only).
+LIVE_ANSWERS_KEPT = 4
+_live_answers = OrderedDict()
+_live_lock = threading.Lock()
+
+def collect_live_answers():
+    """Keep the text of the latest calls up to date from the streamed summary events."""
+    events = summary_events.subscribe(tokens=True)
+    while True:
+        event = events.get()
+        if event["type"] != "token":
+            continue
+        with _live_lock:
+            _live_answers[event["call"]] = _live_answers.pop(event["call"], "") + event["text"]
+            while len(_live_answers) > LIVE_ANSWERS_KEPT:
+                _live_answers.popitem(last=False)
+
+def show_live_answers() -> str:
+    with _live_lock:
+        answers = list(_live_answers.items())
+    return "\n\n".join(f"[{call[:8]}] {text}" for call, text in reversed(answers))
+
+def load_job_result(job_id: str) -> str:
+    job = get_job_queue().get((job_id or "").strip())
+    if job is None:
+        return f"Job `{job_id}` is unknown."
+    if job.status == "failed":
+        return f"Job failed: {job.error}"
+    return job.result or f"Job `{job.id}` is {job.status} ({job.message})."
+
 if "--gradio" in sys.argv:
+    # Gradio takes seconds to import; only load it when the interface is actually launched,
+    # so that the helpers above can be imported and used on their own.
+    import gradio as gr
+
+    # Summaries saved as files by earlier runs are added to the store once.
+    import_saved_outputs(get_store(), EXAMPLE_REPOS_DIR)
+    # Model answers are streamed while the interface runs, to show them as they are written.
+    threading.Thread(target=collect_live_answers, daemon=True).start()
+
     with gr.Blocks() as demo:
         gr.Markdown("## Repo Summarizer Interface")
         with gr.Tabs():
+            with gr.Tab("Summarize Repository"):
+                gr.Markdown("### Summarize a repository in the background and follow its progress")
+                repo_url_box = gr.Textbox(label="Repository URL (e.g. https://github.com/user/repo.git)")
+                submit_output = gr.Markdown()
+                repo_url_box.submit(fn=submit_summary_job, inputs=repo_url_box, outputs=submit_output)
+                gr.Button("Summarize").click(fn=submit_summary_job, inputs=repo_url_box, outputs=submit_output)
+                jobs_table = gr.Dataframe(
+                    headers=["id", "repository", "commit", "status", "progress", "message", "seconds"],
+                    value=list_summary_jobs, every=2, interactive=False)
+                job_id_box = gr.Textbox(label="Job id")
+                job_output = gr.Markdown()
+                with gr.Row():
+                    gr.Button("Show Result").click(fn=load_job_result, inputs=job_id_box, outputs=job_output)
+                    gr.Button("Cancel Job").click(fn=cancel_summary_job, inputs=job_id_box, outputs=job_output)
+                gr.Markdown("#### Folders summarized so far (leaves first)")
+                job_folder_dropdown = gr.Dropdown(label="Folder ('.' is the root)", choices=[])
+                job_folder_output = gr.Markdown()
+                def refresh_job_folders(job_id: str):
+                    return gr.update(choices=list_job_folders(job_id))
+                job_id_box.change(fn=refresh_job_folders, inputs=job_id_box, outputs=job_folder_dropdown)
+                gr.Button("Refresh Folders").click(fn=refresh_job_folders, inputs=job_id_box,
+                                                   outputs=job_folder_dropdown)
+                job_folder_dropdown.change(fn=load_job_folder, inputs=[job_id_box, job_folder_dropdown],
+                                           outputs=job_folder_output)
+                gr.Textbox(label="Answers being generated", value=show_live_answers, every=1,
+                           lines=8, interactive=False)
             with gr.Tab("Load Global Summary"):
-                saved_files_dropdown = gr.Dropdown(label="Saved Global Summaries", choices=list_saved_summaries())
+                repos_dropdown = gr.Dropdown(label="Summarized Repositories", choices=list_stored_repos())
                 load_button = gr.Button("Load Summary")
                 loaded_summary_output = gr.Markdown()
-                load_button.click(fn=load_structure, inputs=saved_files_dropdown, outputs=loaded_summary_output)
+                load_button.click(fn=load_global_summary, inputs=repos_dropdown, outputs=loaded_summary_output)
                 refresh_button = gr.Button("Refresh List")
-                refresh_button.click(fn=list_saved_summaries, inputs=[], outputs=saved_files_dropdown)
+                refresh_button.click(fn=lambda: gr.update(choices=list_stored_repos()), inputs=[],
+                                     outputs=repos_dropdown)
             with gr.Tab("View Summary Tree"):
-                gr.Markdown("### Load a saved summary tree and inspect subsummaries")
-                tree_files_dropdown = gr.Dropdown(label="Saved Summary Trees", choices=list_saved_trees())
-                load_tree_button = gr.Button("Load Summary Tree")
-                tree_state = gr.State({})
-                node_dropdown = gr.Dropdown(label="Select Folder/Subfolder", choices=[])
+                gr.Markdown("### Browse the folders of a summarized repository and inspect subsummaries")
+                tree_repo_dropdown = gr.Dropdown(label="Repository", choices=list_stored_repos())
+                prefix_box = gr.Textbox(label="Folder path prefix (e.g. src/)", value="")
+                node_dropdown = gr.Dropdown(label="Select Folder/Subfolder ('.' is the root)", choices=[])
                 node_summary_output = gr.Markdown()
-                def load_tree_fn(file_name: str):
-                    keys, tree_dict = load_tree_file(file_name)
-                    default = keys[0] if keys else None
-                    return gr.update(choices=keys, value=default), tree_dict
-                load_tree_button.click(fn=load_tree_fn, inputs=tree_files_dropdown, outputs=[node_dropdown, tree_state])
-                node_dropdown.change(fn=lambda key, state: get_node_summary(key, state),
-                                    inputs=[node_dropdown, tree_state],
-                                    outputs=node_summary_output)
-    demo.launch()
\ No newline at end of file
+                def refresh_nodes(repo: str, prefix: str):
+                    keys = list_folder_keys(repo, prefix)
+                    return gr.update(choices=keys, value=keys[0] if keys else None)
+                tree_repo_dropdown.change(fn=refresh_nodes, inputs=[tree_repo_dropdown, prefix_box],
+                                          outputs=node_dropdown)
+                prefix_box.submit(fn=refresh_nodes, inputs=[tree_repo_dropdown, prefix_box], outputs=node_dropdown)
+                node_dropdown.change(fn=load_node_summary, inputs=[tree_repo_dropdown, node_dropdown],
+                                     outputs=node_summary_output)
+            with gr.Tab("Search"):
+                gr.Markdown("### Full-text search across every stored summary")
+                query_box = gr.Textbox(label="Query (e.g. parser, \"rate limit\", token*)")
+                search_repo_dropdown = gr.Dropdown(label="Only in repository (optional)", choices=list_stored_repos())
+                search_output = gr.Markdown()
+                query_box.submit(fn=search_summaries, inputs=[query_box, search_repo_dropdown], outputs=search_output)
+                gr.Button("Search").click(fn=search_summaries, inputs=[query_box, search_repo_dropdown],
+                                          outputs=search_output)
+    # Queue the event handlers so that concurrent users do not wait on each other.
+    demo.queue(default_concurrency_limit=None).launch()
@@ -0,0 +1,159 @@
+"""
+Offline benchmark of the summarization pipeline (build_folder_tree + summarize_folder)
+on synthetic repositories, using the deterministic FakeBackend instead of the Mistral API.
+
+    python benchmarks/run_benchmarks.py                            # run and print results
+    python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+
+With --baseline the script exits with status 1 when a case makes more API calls than in
+the baseline or its throughput dropped by more than --tolerance, so it can gate CI.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_repos import GENERATORS
+from functions.backends import FakeBackend, set_backend
+from functions.summary_cache import configure_cache
+from functions.scheduler import set_max_concurrency
+from functions.files_exclusion import load_gitignore
+from functions.folder_tree import build_folder_tree
+from functions.folder_summarization import summarize_folder
+from functions.dedup import prompt_memo, folder_memo, file_memo
+from functions.notebooks import notebook_sources
+from functions.ingest import file_digests
+from functions import extractors
+
+# Skeleton mode of the cases that must not use the default one: the huge files would fit in
+# one prompt as skeletons, and this case measures the chunked summarization of process_file.
+CASE_SKELETON_MODES = {"huge_files": "off"}
+
+
+def count_tree(node):
+    folders, files = 0, 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        folders += 1
+        files += len(current.files)
+        stack.extend(current.subfolders)
+    return folders, files
+
+
+def run_case(name, root, args):
+    """Generate one synthetic repository, summarize it and return its measurements."""
+    GENERATORS[name](root, scale=args.scale, seed=args.seed)
+    default_mode = extractors.SKELETON_MODE
+    extractors.set_skeleton_mode(CASE_SKELETON_MODES.get(name, default_mode))
+    try:
+        return _run_repeats(root, args)
+    finally:
+        extractors.set_skeleton_mode(default_mode)
+
+
+def _run_repeats(root, args):
+    best = None
+    for _ in range(args.repeat):
+        # Every repetition starts cold: no in-process memo and no summary cache.
+        for memo in (prompt_memo, folder_memo, file_memo, notebook_sources, file_digests):
+            memo.clear()
+        backend = FakeBackend(latency=args.latency, failure_rate=args.failure_rate,
+                              output_words=args.output_words, seed=args.seed)
+        set_backend(backend)
+        started = time.perf_counter()
+        tree = build_folder_tree(root, root, load_gitignore(root))
+        built = time.perf_counter()
+        # The pipeline prints every folder summary; keep it out of the report.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            summarize_folder(tree)
+        finished = time.perf_counter()
+        folders, files = count_tree(tree)
+        result = {
+            "folders": folders,
+            "files": files,
+            "api_calls": backend.calls,
+            "build_seconds": round(built - started, 4),
+            "summarize_seconds": round(finished - built, 4),
+            "total_seconds": round(finished - started, 4),
+            "files_per_second": round(files / max(finished - started, 1e-9), 1),
+        }
+        if best is None or result["total_seconds"] < best["total_seconds"]:
+            best = result
+    return best
+
+
+def compare(results, baseline, tolerance):
+    """Return the list of regressions of 'results' against 'baseline'."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["api_calls"] > reference["api_calls"]:
+            regressions.append(f"{name}: {result['api_calls']} API calls (baseline {reference['api_calls']})")
+        floor = reference["files_per_second"] * (1 - tolerance)
+        if result["files_per_second"] < floor:
+            regressions.append(f"{name}: {result['files_per_second']} files/s "
+                               f"(baseline {reference['files_per_second']}, tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the summarization pipeline offline.")
+    parser.add_argument('--cases', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS),
+                        help="Repository shapes to benchmark (default: all).")
+    parser.add_argument('--scale', type=int, default=1, help="Size multiplier of the synthetic repositories.")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the fastest is reported.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help="Simulated seconds per API call.")
+    parser.add_argument('--failure_rate', type=float, default=0.0, help="Probability of a simulated 503.")
+    parser.add_argument('--output_words', type=int, default=60, help="Words per generated summary.")
+    parser.add_argument('--max_concurrency', type=int, default=None)
+    parser.add_argument('--save', default=None, help="Write the results to this JSON file.")
+    parser.add_argument('--baseline', default=None, help="Compare against results saved with --save.")
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help="Allowed relative throughput drop against the baseline (default: 0.3).")
+    args = parser.parse_args()
+
+    configure_cache(enabled=False)
+    if args.max_concurrency:
+        set_max_concurrency(args.max_concurrency)
+
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="code_summary_bench_")
+    try:
+        for name in args.cases:
+            results[name] = run_case(name, os.path.join(work_dir, name), args)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{'case':<12}{'folders':>9}{'files':>8}{'calls':>8}{'build s':>10}{'summ. s':>10}{'files/s':>10}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['folders']:>9}{r['files']:>8}{r['api_calls']:>8}"
+              f"{r['build_seconds']:>10.3f}{r['summarize_seconds']:>10.3f}{r['files_per_second']:>10.1f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.save}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regression against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
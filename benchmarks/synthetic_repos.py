@@ -0,0 +1,87 @@
+import os
+import json
+import base64
+import random
+
+# -----------------------------
+# Synthetic Repository Generators
+# -----------------------------
+# Every generator writes a deterministic tree (for a given seed and scale) under 'root' and
+# returns it. Contents are unique per file, so deduplication does not skew the measurements.
+
+
+def _python_module(rng, name, functions):
+    lines = [f'"""Module {name}."""', "import os", ""]
+    for i in range(functions):
+        a, b = rng.randint(0, 10 ** 6), rng.randint(0, 10 ** 6)
+        lines += [f"def {name}_func_{i}(value):",
+                  f"    # Combine the value with constants {a} and {b}.",
+                  f"    return (value * {a} + {b}) % {rng.randint(2, 10 ** 6)}",
+                  ""]
+    return "\n".join(lines)
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def deep_repo(root, scale=1, seed=0):
+    """A single chain of 50 * scale nested folders, with two small modules per level."""
+    rng = random.Random(seed)
+    path = root
+    for level in range(50 * scale):
+        path = os.path.join(path, f"level_{level}")
+        for j in range(2):
+            _write(os.path.join(path, f"mod_{level}_{j}.py"), _python_module(rng, f"l{level}_{j}", 5))
+    return root
+
+
+def wide_repo(root, scale=1, seed=0):
+    """40 * scale sibling packages of three modules, plus one flat folder of 200 * scale modules."""
+    rng = random.Random(seed)
+    for i in range(40 * scale):
+        for j in range(3):
+            _write(os.path.join(root, f"pkg_{i}", f"mod_{j}.py"), _python_module(rng, f"p{i}_{j}", 8))
+    for i in range(200 * scale):
+        _write(os.path.join(root, "flat", f"file_{i}.py"), _python_module(rng, f"f{i}", 12))
+    return root
+
+
+def huge_files_repo(root, scale=1, seed=0):
+    """
+    2 * scale source files of about 600 KB each, larger than one prompt, so they are chunked
+    (the case runs with skeletons off, see run_benchmarks.CASE_SKELETON_MODES).
+    """
+    rng = random.Random(seed)
+    for i in range(2 * scale):
+        _write(os.path.join(root, "big", f"huge_{i}.py"), _python_module(rng, f"h{i}", 4000))
+    _write(os.path.join(root, "README.md"), "# Repository with huge files\n")
+    return root
+
+
+def notebooks_repo(root, scale=1, seed=0):
+    """20 * scale Jupyter notebooks whose outputs carry large embedded images."""
+    rng = random.Random(seed)
+    for i in range(20 * scale):
+        cells = []
+        for j in range(10):
+            image = base64.b64encode(rng.randbytes(20000)).decode("ascii")
+            cells.append({"cell_type": "markdown", "metadata": {},
+                          "source": [f"## Step {j} of notebook {i}\n", f"Seed {rng.randint(0, 10 ** 6)}\n"]})
+            cells.append({"cell_type": "code", "execution_count": j, "metadata": {},
+                          "source": _python_module(rng, f"n{i}_{j}", 2).splitlines(keepends=True),
+                          "outputs": [{"output_type": "display_data", "metadata": {},
+                                       "data": {"image/png": image, "text/plain": ["<Figure>"]}}]})
+        notebook = {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+        _write(os.path.join(root, "notebooks", f"analysis_{i}.ipynb"), json.dumps(notebook))
+    return root
+
+
+GENERATORS = {
+    "deep": deep_repo,
+    "wide": wide_repo,
+    "huge_files": huge_files_repo,
+    "notebooks": notebooks_repo,
+}
@@ -0,0 +1,234 @@
+import io
+import os
+import zlib
+import hashlib
+import tarfile
+import zipfile
+import threading
+import pathspec
+
+from .folder_tree import FolderNode
+from .files_exclusion import should_exclude_dir, should_exclude_file, should_process_file_content, is_ignored
+from .ingest import MAX_FILE_BYTES, MAX_NOTEBOOK_BYTES
+from .sources import mount, unmount
+
+# -----------------------------
+# Archive Sources (.zip, .tar.gz, .tar.zst)
+# -----------------------------
+ARCHIVE_SUFFIXES = ('.zip', '.tar.gz', '.tgz', '.tar.zst', '.tar.zstd', '.tzst')
+READ_BLOCK_BYTES = 1024 * 1024
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be opened or read."""
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def archive_base_name(path):
+    """Return the archive's file name without its archive suffix (e.g. 'drop' for 'drop.tar.gz')."""
+    name = os.path.basename(path)
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def _normalize_member(name):
+    name = name.replace('\\', '/')
+    while name.startswith('./'):
+        name = name[2:]
+    return name.lstrip('/')
+
+
+class ArchiveSource:
+    """
+    A source tree read straight from an archive, without extracting it to disk.
+
+    Zip archives are indexed from their central directory and members are decompressed on
+    demand. Tarballs (.tar.gz, .tar.zst) have no index and no cheap random access, so they
+    are read in one sequential pass: every member is hashed, and the contents of the members
+    that can end up in a prompt (processable extension, under the size cap) are kept in
+    memory, zlib-compressed.
+
+    While open, the archive is mounted at its own path (see sources.mount), so FolderNode
+    paths below root_path are read from the archive by the rest of the pipeline.
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = os.path.abspath(archive_path)
+        self.name = archive_base_name(archive_path)
+        self.root_path = self.archive_path
+        self._sizes = {}
+        self._digests = {}
+        self._contents = {}
+        self._gitignores = {}
+        self._zip = None
+        self._zip_infos = {}
+        self._lock = threading.Lock()
+        try:
+            if self.archive_path.lower().endswith('.zip'):
+                self._index_zip()
+            else:
+                self._index_tar()
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, zlib.error) as e:
+            self.close()
+            raise ArchiveError(f"Cannot read archive {archive_path}: {e}")
+        mount(self.root_path, self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        unmount(self.root_path)
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        self._contents = {}
+
+    # -----------------------------
+    # Indexing
+    # -----------------------------
+    def _index_zip(self):
+        self._zip = zipfile.ZipFile(self.archive_path)
+        for info in self._zip.infolist():
+            if info.is_dir():
+                continue
+            member = _normalize_member(info.filename)
+            self._sizes[member] = info.file_size
+            self._zip_infos[member] = info
+            if os.path.basename(member) == '.gitignore':
+                self._gitignores[os.path.dirname(member)] = self._zip.read(info).decode('utf-8', errors='replace')
+
+    def _open_tar_stream(self):
+        lower = self.archive_path.lower()
+        if lower.endswith(('.tar.gz', '.tgz')):
+            return tarfile.open(self.archive_path, mode='r|gz'), None
+        try:
+            import zstandard
+        except ImportError:
+            raise ArchiveError("Reading .tar.zst archives requires the 'zstandard' package")
+        raw = open(self.archive_path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(raw)
+        return tarfile.open(fileobj=reader, mode='r|'), raw
+
+    def _keeps_content(self, member, size):
+        name = os.path.basename(member)
+        if name == '.gitignore':
+            return True
+        if should_exclude_file(name) or not should_process_file_content(name):
+            return False
+        max_bytes = MAX_NOTEBOOK_BYTES if name.lower().endswith('.ipynb') else MAX_FILE_BYTES
+        return size <= max_bytes
+
+    def _index_tar(self):
+        tar, raw = self._open_tar_stream()
+        try:
+            for info in tar:
+                if not info.isfile():
+                    continue
+                member = _normalize_member(info.name)
+                keep = self._keeps_content(member, info.size)
+                digest = hashlib.sha256()
+                blocks = []
+                f = tar.extractfile(info)
+                for block in iter(lambda: f.read(READ_BLOCK_BYTES), b''):
+                    digest.update(block)
+                    if keep:
+                        blocks.append(block)
+                self._sizes[member] = info.size
+                self._digests[member] = digest.hexdigest()
+                if keep:
+                    data = b''.join(blocks)
+                    if os.path.basename(member) == '.gitignore':
+                        self._gitignores[os.path.dirname(member)] = data.decode('utf-8', errors='replace')
+                    self._contents[member] = zlib.compress(data, 1)
+        finally:
+            tar.close()
+            if raw is not None:
+                raw.close()
+
+    # -----------------------------
+    # Source Interface (see sources.py)
+    # -----------------------------
+    def size(self, member):
+        try:
+            return self._sizes[member]
+        except KeyError:
+            raise FileNotFoundError(f"{member} not found in {self.archive_path}")
+
+    def open(self, member):
+        if self._zip is not None:
+            info = self._zip_infos.get(member)
+            if info is None:
+                raise FileNotFoundError(f"{member} not found in {self.archive_path}")
+            return self._zip.open(info)
+        data = self._contents.get(member)
+        if data is None:
+            raise FileNotFoundError(f"{member} is not kept in memory from {self.archive_path}")
+        return io.BytesIO(zlib.decompress(data))
+
+    def digest(self, member):
+        with self._lock:
+            known = self._digests.get(member)
+        if known is not None:
+            return known
+        digest = hashlib.sha256()
+        with self.open(member) as f:
+            for block in iter(lambda: f.read(READ_BLOCK_BYTES), b''):
+                digest.update(block)
+        with self._lock:
+            self._digests[member] = digest.hexdigest()
+        return self._digests[member]
+
+    # -----------------------------
+    # Folder Tree
+    # -----------------------------
+    def build_tree(self):
+        """
+        Build the FolderNode tree of the archive from its member list, applying the same
+        exclusion rules as build_folder_tree (including nested .gitignore files).
+        """
+        root = FolderNode(name=self.name, path=self.root_path)
+        specs = {}
+        for base_dir, text in self._gitignores.items():
+            specs[base_dir] = pathspec.PathSpec.from_lines('gitwildmatch', text.splitlines())
+
+        def specs_for(rel_dir):
+            parts = rel_dir.split('/') if rel_dir else []
+            bases = [''] + ['/'.join(parts[:i + 1]) for i in range(len(parts))]
+            return tuple((base, specs[base]) for base in bases if base in specs)
+
+        folders = {'': root}
+        excluded_dirs = set()
+        for member in self._sizes:
+            *dir_parts, file_name = member.split('/')
+            node = root
+            rel_dir = ''
+            for part in dir_parts:
+                parent_dir = rel_dir
+                rel_dir = f"{rel_dir}/{part}" if rel_dir else part
+                if rel_dir in excluded_dirs:
+                    node = None
+                    break
+                child = folders.get(rel_dir)
+                if child is None:
+                    if should_exclude_dir(part) or is_ignored(rel_dir, specs_for(parent_dir), is_dir=True):
+                        excluded_dirs.add(rel_dir)
+                        node = None
+                        break
+                    child = FolderNode(name=part)
+                    node.add_subfolder(child)
+                    folders[rel_dir] = child
+                node = child
+            if node is None:
+                continue
+            if should_exclude_file(file_name) or is_ignored(member, specs_for(rel_dir)):
+                continue
+            node.add_file(file_name)
+        return root
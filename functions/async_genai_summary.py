@@ -0,0 +1,109 @@
+import asyncio
+
+from .genai_summary import build_prompt, build_messages, route_model
+from .backends import get_backend
+from .summary_cache import summary_cache
+from . import scheduler
+from . import routing
+from .profiling import profiler
+from .rate_limit import request_bucket, plan_retry, MAX_RETRIES, REQUEST_TIMEOUT
+
+
+class AsyncSummaryClient:
+    """
+    asyncio counterpart of generate_summary.
+
+    Every request goes through the summary cache, the model routing policy, a token-bucket
+    rate limiter (shared and per model), a cap on in-flight requests and a per-request
+    timeout, and failures are retried with the same policy as the sync client
+    (rate_limit.plan_retry). Unlike generate_summary, identical prompts issued at the same
+    time are not coalesced (no prompt memo), answers are not streamed as events, and the
+    per-model in-flight caps of routing.model_limiter do not apply: max_in_flight does.
+    """
+
+    def __init__(self, backend=None, max_in_flight=None,
+                 bucket=None, max_retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT):
+        # Without an explicit backend, the shared one (see backends.get_backend) is used.
+        self.backend = backend
+        self.max_in_flight = max_in_flight or scheduler.max_concurrency
+        self.bucket = bucket or request_bucket
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.retries = 0
+        self._semaphore = None
+
+    def _in_flight(self):
+        # One semaphore per event loop, since asyncio primitives cannot be shared across loops.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore[0] is not loop:
+            self._semaphore = (loop, asyncio.Semaphore(self.max_in_flight))
+        return self._semaphore[1]
+
+    def backend_for(self, call_type, prompt):
+        """Return the backend answering a prompt, routed by call type and size like generate_summary."""
+        if self.backend is None:
+            return get_backend(route_model(call_type, prompt))
+        if routing.get_policy() is None:
+            return self.backend
+        return self.backend.for_model(route_model(call_type, prompt))
+
+    async def complete(self, prompt, backend=None, call_type=None):
+        """Send a single prompt to the API and return the response text, retrying transient failures."""
+        backend = backend or self.backend or get_backend()
+        attempt = 0
+        while True:
+            await self.bucket.acquire_async()
+            await routing.model_limiter.acquire_rate_async(backend.model)
+            try:
+                async with self._in_flight():
+                    with profiler.span("api_call", prompt_chars=len(prompt), attempt=attempt,
+                                       model=backend.model, call_type=call_type) as span:
+                        completion = await asyncio.wait_for(
+                            backend.complete_async(build_messages(prompt), timeout=self.timeout),
+                            timeout=self.timeout,
+                        )
+                        span.set(prompt_tokens=completion.prompt_tokens,
+                                 completion_tokens=completion.completion_tokens)
+                profiler.count("api_calls")
+                profiler.count(f"api_calls:{backend.model}")
+                profiler.record_usage(completion, model=backend.model)
+                return completion.text
+            except Exception as e:
+                delay = plan_retry(e, attempt, self.max_retries)
+                if delay is None:
+                    raise
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def generate_summary(self, text, call_type="folder"):
+        prompt = build_prompt(text)
+        backend = self.backend_for(call_type, prompt)
+        cache_key = summary_cache.make_key(backend.model, prompt)
+        cached = summary_cache.get(cache_key)
+        if cached is not None:
+            profiler.count("cache_hits")
+            return cached
+        profiler.count("cache_misses")
+        summary = await self.complete(prompt, backend=backend, call_type=call_type)
+        summary_cache.put(cache_key, summary)
+        return summary
+
+    async def generate_summaries(self, texts, call_type="folder"):
+        """Summarize several texts concurrently; results follow the input order."""
+        return await asyncio.gather(*(self.generate_summary(text, call_type) for text in texts))
+
+
+_default_client = None
+
+
+def get_async_client():
+    global _default_client
+    if _default_client is None:
+        _default_client = AsyncSummaryClient()
+    return _default_client
+
+
+async def agenerate_summary(text, call_type="folder"):
+    """Async variant of generate_summary using the shared AsyncSummaryClient."""
+    return await get_async_client().generate_summary(text, call_type)
@@ -0,0 +1,226 @@
+import os
+import copy
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from collections import namedtuple
+
+# -----------------------------
+# Backend Settings
+# -----------------------------
+# Which backend answers summarization prompts: 'mistral' (the API) or 'fake' (offline,
+# deterministic; for benchmarks and tests).
+BACKEND = os.environ.get("SUMMARY_BACKEND", "mistral")
+MISTRAL_MODEL = "mistral-large-latest"
+# Fake backend behaviour: seconds per call, probability of a (retryable) failure, and number
+# of words in each generated summary.
+FAKE_LATENCY = float(os.environ.get("SUMMARY_FAKE_LATENCY", 0.0))
+FAKE_FAILURE_RATE = float(os.environ.get("SUMMARY_FAKE_FAILURE_RATE", 0.0))
+FAKE_OUTPUT_WORDS = int(os.environ.get("SUMMARY_FAKE_OUTPUT_WORDS", 60))
+
+# Text of one model answer, with the token usage reported for the call (None if unknown).
+Completion = namedtuple("Completion", ["text", "prompt_tokens", "completion_tokens"])
+
+
+class SummaryBackend:
+    """
+    Interface of the models answering summarization prompts.
+
+    'model' names the model; it is part of the summary cache keys, so summaries from different
+    backends never mix. complete(messages, timeout) sends one chat request and returns a
+    Completion; complete_async is its asyncio counterpart. stream(messages, on_token, timeout)
+    does the same but calls on_token(text) with each piece of the answer as it is generated;
+    backends that cannot stream deliver the whole answer as one piece. for_model(model) returns
+    the same backend answering with another model (used by model routing). Transient failures should raise
+    errors carrying an HTTP 'status_code' so that rate_limit.is_retryable recognizes them.
+    """
+    model = None
+
+    def complete(self, messages, timeout=None):
+        raise NotImplementedError
+
+    async def complete_async(self, messages, timeout=None):
+        return await asyncio.to_thread(self.complete, messages, timeout)
+
+    def stream(self, messages, on_token, timeout=None):
+        completion = self.complete(messages, timeout)
+        on_token(completion.text)
+        return completion
+
+    def for_model(self, model):
+        twin = copy.copy(self)
+        twin.model = model
+        return twin
+
+
+class MistralBackend(SummaryBackend):
+    """
+    Mistral chat API. The SDK client is only created on the first request, so that nothing
+    needs an API key until a summary is actually requested.
+    """
+
+    def __init__(self, model=MISTRAL_MODEL, api_key=None, server_url=None):
+        self.model = model
+        self.api_key = api_key
+        self.server_url = server_url
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from mistralai import Mistral
+                from dotenv import load_dotenv
+                load_dotenv()
+                api_key = self.api_key or os.environ.get("MISTRAL_API_KEY")
+                if not api_key:
+                    raise RuntimeError("MISTRAL_API_KEY is not set (in the environment or a .env file)")
+                # MISTRAL_SERVER_URL lets the client talk to another endpoint (e.g. a local fake server).
+                server_url = self.server_url or os.environ.get("MISTRAL_SERVER_URL")
+                self._client = Mistral(api_key=api_key, server_url=server_url)
+            return self._client
+
+    @staticmethod
+    def _completion(chat_response):
+        usage = getattr(chat_response, "usage", None)
+        return Completion(chat_response.choices[0].message.content,
+                          getattr(usage, "prompt_tokens", None),
+                          getattr(usage, "completion_tokens", None))
+
+    def complete(self, messages, timeout=None):
+        chat_response = self.client.chat.complete(
+            model=self.model,
+            messages=messages,
+            timeout_ms=int(timeout * 1000) if timeout else None,
+        )
+        return self._completion(chat_response)
+
+    async def complete_async(self, messages, timeout=None):
+        chat_response = await self.client.chat.complete_async(
+            model=self.model,
+            messages=messages,
+        )
+        return self._completion(chat_response)
+
+    def stream(self, messages, on_token, timeout=None):
+        pieces = []
+        usage = None
+        for event in self.client.chat.stream(
+            model=self.model,
+            messages=messages,
+            timeout_ms=int(timeout * 1000) if timeout else None,
+        ):
+            chunk = event.data
+            # The last chunk carries the token usage of the whole call.
+            usage = getattr(chunk, "usage", None) or usage
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                pieces.append(text)
+                on_token(text)
+        return Completion("".join(pieces),
+                          getattr(usage, "prompt_tokens", None),
+                          getattr(usage, "completion_tokens", None))
+
+
+class FakeBackendError(Exception):
+    """Simulated transient API failure (HTTP 503), retried like a real one."""
+    status_code = 503
+
+
+class FakeBackend(SummaryBackend):
+    """
+    Offline backend for benchmarks and tests. Each call sleeps 'latency' seconds, fails with
+    probability 'failure_rate', and otherwise answers with 'output_words' words derived from
+    a hash of the prompt, so the same prompt always gets the same summary.
+    """
+
+    def __init__(self, latency=FAKE_LATENCY, failure_rate=FAKE_FAILURE_RATE,
+                 output_words=FAKE_OUTPUT_WORDS, seed=0):
+        self.model = "fake"
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.output_words = output_words
+        # Shared with the twins made by for_model, so that 'calls' counts all of them.
+        self._calls = [0]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self):
+        return self._calls[0]
+
+    def _answer(self, messages):
+        prompt = "".join(message["content"] for message in messages)
+        with self._lock:
+            self._calls[0] += 1
+            failed = self._rng.random() < self.failure_rate
+        if failed:
+            raise FakeBackendError("fake backend: simulated 503 Service Unavailable")
+        if self.model != "fake":
+            # Routed twins answer differently from one another.
+            prompt = self.model + prompt
+        digest = hashlib.sha256(prompt.encode("utf-8", errors="replace")).hexdigest()
+        words = [f"w{digest[i % 60:i % 60 + 4]}" for i in range(self.output_words)]
+        return Completion(" ".join(words), int(len(prompt) / 3.5) + 1, self.output_words)
+
+    def complete(self, messages, timeout=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(messages)
+
+    async def complete_async(self, messages, timeout=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._answer(messages)
+
+    def stream(self, messages, on_token, timeout=None):
+        # The answer is produced word by word over the call's latency.
+        completion = self._answer(messages)
+        words = completion.text.split(" ")
+        for i, word in enumerate(words):
+            if self.latency:
+                time.sleep(self.latency / len(words))
+            on_token(word if i == 0 else " " + word)
+        return completion
+
+
+_backend = None
+_model_backends = {}
+_backend_lock = threading.Lock()
+
+
+def backend_from_env():
+    """Create the backend selected by SUMMARY_BACKEND."""
+    if BACKEND == "fake":
+        return FakeBackend()
+    if BACKEND == "mistral":
+        return MistralBackend()
+    raise ValueError(f"Unknown SUMMARY_BACKEND '{BACKEND}' (expected 'mistral' or 'fake')")
+
+
+def get_backend(model=None):
+    """
+    Return the backend answering summarization prompts, creating it on first use.
+    With 'model', return it answering with that model instead of its own.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = backend_from_env()
+        if model is None or model == _backend.model:
+            return _backend
+        if model not in _model_backends:
+            _model_backends[model] = _backend.for_model(model)
+        return _model_backends[model]
+
+
+def set_backend(backend):
+    """Replace the process-wide backend (e.g. with a FakeBackend). Returns the previous one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+        _model_backends.clear()
+    return previous
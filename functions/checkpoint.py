@@ -0,0 +1,65 @@
+import os
+import json
+import threading
+
+# -----------------------------
+# Checkpoint Journal
+# -----------------------------
+# While a run is in progress, every finished folder summary is appended to
+# checkpoint_<repo>.jsonl as one JSON line. If the run dies, the next run with --resume
+# reloads the journal and only summarizes the folders that were not finished yet.
+# The journal is deleted once the run completes.
+
+
+def journal_file_path(output_dir, repo_name):
+    return os.path.join(output_dir, f"checkpoint_{repo_name}.jsonl")
+
+
+class CheckpointJournal:
+    """Append-only journal of completed folder summaries, safe to write from worker threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self, fingerprints):
+        """
+        Return the journaled summaries whose folder still has the same content fingerprint,
+        as a dict mapping folder keys to summaries. A truncated last line is ignored.
+        """
+        summaries = {}
+        if not os.path.exists(self.path):
+            return summaries
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                key = entry.get("key")
+                if key in fingerprints and entry.get("fingerprint") == fingerprints[key]:
+                    summaries[key] = entry["summary"]
+        return summaries
+
+    def open(self, resume=False):
+        """Start journaling, appending to the existing journal when resuming."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        return self
+
+    def record(self, key, fingerprint, summary):
+        """Append one completed folder summary and flush it to disk immediately."""
+        line = json.dumps({"key": key, "fingerprint": fingerprint, "summary": summary})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self, remove=False):
+        """Close the journal, deleting it when the run it tracks has completed."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,197 @@
+import os
+import stat
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+
+# -----------------------------
+# Clone Cache Settings
+# -----------------------------
+CLONE_CACHE_DIR = os.environ.get("SUMMARY_CLONE_CACHE_DIR",
+                                 os.path.join(tempfile.gettempdir(), "code_summary_mirrors"))
+CLONE_CACHE_MAX_BYTES = int(os.environ.get("SUMMARY_CLONE_CACHE_MAX_BYTES", 5 * 1024 * 1024 * 1024))
+# History depth of the mirrors; 0 keeps the full commit history (needed by --incremental).
+CLONE_DEPTH = int(os.environ.get("SUMMARY_CLONE_DEPTH", 0))
+
+
+def _remove_readonly(func, path, _):
+    """Change the file permission and retry deletion."""
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+def _git(*args, cwd=None):
+    result = subprocess.run(["git", *args], cwd=cwd, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return result.stdout
+
+
+def _dir_size(path):
+    total = 0
+    for dir_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                total += os.lstat(os.path.join(dir_path, file_name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class CloneManager:
+    """
+    Cache of bare git mirrors from which repositories are checked out.
+
+    Each repository URL is mirrored once under cache_dir as a partial clone
+    (--filter=blob:none, and optionally --depth); later runs only fetch new objects.
+    Checkouts are git worktrees of the mirror, so file contents are fetched on demand and
+    git history stays available in the checkout. Mirrors are evicted least recently used
+    first once the cache exceeds max_bytes. Blobs can also be read straight from a mirror
+    without any checkout.
+    """
+
+    def __init__(self, cache_dir=CLONE_CACHE_DIR, max_bytes=CLONE_CACHE_MAX_BYTES, depth=CLONE_DEPTH,
+                 blob_filter=True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.depth = depth
+        self.blob_filter = blob_filter
+        self._lock = threading.Lock()
+        self._mirror_locks = {}
+        self._checkouts = {}
+
+    def mirror_path(self, url):
+        """Return the cache location of the mirror of 'url'."""
+        name = url.rstrip("/").split("/")[-1]
+        if name.endswith(".git"):
+            name = name[:-4]
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{name}-{digest}.git")
+
+    def _mirror_lock(self, mirror):
+        with self._lock:
+            return self._mirror_locks.setdefault(mirror, threading.Lock())
+
+    def _fetch_args(self):
+        args = []
+        if self.blob_filter:
+            args.append("--filter=blob:none")
+        if self.depth:
+            args.append(f"--depth={self.depth}")
+        return args
+
+    def _update_mirror_locked(self, url, mirror):
+        if os.path.isdir(mirror):
+            _git("fetch", "--prune", *self._fetch_args(), "origin", cwd=mirror)
+        else:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _git("clone", "--mirror", *self._fetch_args(), url, mirror)
+        # The mirror's mtime records when it was last used, for LRU eviction.
+        os.utime(mirror)
+
+    def update_mirror(self, url):
+        """Create the mirror of 'url', or fetch what changed since it was last updated."""
+        mirror = self.mirror_path(url)
+        with self._mirror_lock(mirror):
+            self._update_mirror_locked(url, mirror)
+        return mirror
+
+    def checkout(self, url, dest, rev="HEAD"):
+        """
+        Check out 'rev' of the repository at 'url' into 'dest' (replacing anything there)
+        as a detached worktree of its cached mirror. Returns dest.
+        """
+        mirror = self.mirror_path(url)
+        # Fetch, worktree creation and registration happen under one hold of the mirror
+        # lock, so evict() cannot delete the mirror in between.
+        with self._mirror_lock(mirror):
+            self._update_mirror_locked(url, mirror)
+            if os.path.exists(dest):
+                shutil.rmtree(dest, onerror=_remove_readonly)
+            _git("worktree", "prune", cwd=mirror)
+            _git("worktree", "add", "--detach", "--force", dest, rev, cwd=mirror)
+            with self._lock:
+                self._checkouts[os.path.abspath(dest)] = mirror
+        self.evict()
+        return dest
+
+    def release(self, dest):
+        """Delete a checkout made by checkout() and unregister it from its mirror."""
+        with self._lock:
+            mirror = self._checkouts.pop(os.path.abspath(dest), None)
+        if os.path.exists(dest):
+            shutil.rmtree(dest, onerror=_remove_readonly)
+        if mirror is not None and os.path.isdir(mirror):
+            with self._mirror_lock(mirror):
+                _git("worktree", "prune", cwd=mirror)
+
+    def resolve_rev(self, url, rev="HEAD"):
+        """Return the commit id 'rev' currently points to in the remote repository (git ls-remote)."""
+        output = _git("ls-remote", url, rev).decode("utf-8", errors="replace")
+        for line in output.splitlines():
+            commit, _, ref = line.partition("\t")
+            if ref == rev or ref.endswith("/" + rev):
+                return commit
+        raise ValueError(f"{rev} not found in {url}")
+
+    def list_files(self, url, rev="HEAD"):
+        """
+        List the files of 'rev' straight from the mirror, without a checkout.
+        Returns (mode, path) tuples; submodules have mode '160000'.
+        """
+        output = _git("ls-tree", "-r", "-z", rev, cwd=self.mirror_path(url))
+        files = []
+        for entry in output.decode("utf-8", errors="replace").split("\0"):
+            if not entry:
+                continue
+            info, _, path = entry.partition("\t")
+            files.append((info.split(" ")[0], path))
+        return files
+
+    def read_blob(self, url, path, rev="HEAD"):
+        """Return the bytes of 'path' at 'rev' read from the git object store of the mirror."""
+        return _git("cat-file", "blob", f"{rev}:{path}", cwd=self.mirror_path(url))
+
+    def _in_use(self, mirror):
+        with self._lock:
+            return mirror in self._checkouts.values()
+
+    def evict(self):
+        """Delete the least recently used mirrors without checkouts until the cache fits in max_bytes."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        mirrors = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_dir(follow_symlinks=False) and entry.name.endswith(".git"):
+                mirrors.append((entry.stat().st_mtime, _dir_size(entry.path), entry.path))
+        total = sum(size for _, size, _ in mirrors)
+        for mtime, size, mirror in sorted(mirrors):
+            if total <= self.max_bytes:
+                break
+            with self._mirror_lock(mirror):
+                # The list above may be stale: a mirror checked out or fetched since then
+                # (its mtime changed) is kept.
+                try:
+                    if self._in_use(mirror) or os.stat(mirror).st_mtime != mtime:
+                        continue
+                except FileNotFoundError:
+                    total -= size
+                    continue
+                shutil.rmtree(mirror, onerror=_remove_readonly)
+            total -= size
+
+
+# Shared manager used by main.py and summarize_repo.
+clone_manager = CloneManager()
+
+
+def configure_clone_manager(cache_dir=None, max_bytes=None, depth=None):
+    """Change the location, size limit or history depth of the shared clone cache."""
+    if cache_dir is not None:
+        clone_manager.cache_dir = cache_dir
+    if max_bytes is not None:
+        clone_manager.max_bytes = max_bytes
+    if depth is not None:
+        clone_manager.depth = depth
+    return clone_manager
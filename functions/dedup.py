@@ -0,0 +1,262 @@
+import os
+import zlib
+import random
+import threading
+
+from .ingest import file_digest, ingest_file
+from .folder_tree import node_key
+from .sources import get_size
+from .files_exclusion import should_process_file_content
+from .tokens import estimate_tokens, CHARS_PER_TOKEN
+
+# -----------------------------
+# Deduplication Settings
+# -----------------------------
+# Files smaller than this (in estimated tokens) are cheaper to repeat than to collapse.
+DEDUP_MIN_TOKENS = int(os.environ.get("SUMMARY_DEDUP_MIN_TOKENS", 200))
+# Estimated Jaccard similarity above which two files count as near-duplicates.
+NEAR_DUP_THRESHOLD = float(os.environ.get("SUMMARY_NEAR_DUP_THRESHOLD", 0.9))
+# Only files up to this size are shingled for near-duplicate detection.
+NEAR_DUP_MAX_BYTES = int(os.environ.get("SUMMARY_NEAR_DUP_MAX_BYTES", 256 * 1024))
+# MinHash parameters: SHINGLE_WORDS-word shingles, NUM_BANDS bands of BAND_ROWS hashes each.
+SHINGLE_WORDS = 5
+NUM_BANDS = 16
+BAND_ROWS = 4
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(0)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_BANDS * BAND_ROWS)]
+
+
+class DedupStats:
+    """Counters of the work avoided by deduplication, shared by every worker thread."""
+
+    def __init__(self):
+        self.calls_saved = 0
+        self.tokens_saved = 0
+        self.identical_files = 0
+        self.near_duplicate_files = 0
+        self.reused_folders = 0
+        self._lock = threading.Lock()
+
+    def add(self, calls=0, tokens=0, identical_files=0, near_duplicate_files=0, reused_folders=0):
+        with self._lock:
+            self.calls_saved += calls
+            self.tokens_saved += max(0, tokens)
+            self.identical_files += identical_files
+            self.near_duplicate_files += near_duplicate_files
+            self.reused_folders += reused_folders
+
+    def report(self):
+        return (f"Dedup: {self.identical_files} identical and {self.near_duplicate_files} near-duplicate "
+                f"file(s) collapsed, {self.reused_folders} identical folder(s) reused; "
+                f"{self.calls_saved} API call(s) and ~{self.tokens_saved} prompt tokens saved")
+
+
+dedup_stats = DedupStats()
+
+
+class InFlightMemo:
+    """
+    Compute each key at most once per process. A caller asking for a key that another
+    thread is already computing waits for that result instead of computing it again.
+    If the computation fails, waiting callers compute it themselves.
+    """
+
+    def __init__(self):
+        self._results = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Forget every computed value (e.g. between benchmark runs)."""
+        with self._lock:
+            self._results.clear()
+
+    def peek(self, key):
+        """Return the value already computed for key, or None."""
+        with self._lock:
+            return self._results.get(key)
+
+    def get_or_compute(self, key, compute):
+        """Return (value, computed): computed is False when the value came from another call."""
+        while True:
+            with self._lock:
+                if key in self._results:
+                    return self._results[key], False
+                event = self._pending.get(key)
+                if event is None:
+                    event = self._pending[key] = threading.Event()
+                    break
+            event.wait()
+        try:
+            value = compute()
+            with self._lock:
+                self._results[key] = value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            event.set()
+        return value, True
+
+
+# Identical prompts, identical folders (by content fingerprint) and identical files sent to
+# process_file (by content hash) are each summarized once per process, including across
+# the sources of a batch.
+prompt_memo = InFlightMemo()
+folder_memo = InFlightMemo()
+file_memo = InFlightMemo()
+
+
+def file_memo_key(digest):
+    return "process_file:" + digest
+
+
+# -----------------------------
+# MinHash Near-Duplicate Detection
+# -----------------------------
+def shingles(text):
+    """Return the set of hashed SHINGLE_WORDS-word shingles of a text."""
+    words = text.split()
+    if len(words) <= SHINGLE_WORDS:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode("utf-8"))
+            for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash_signature(shingle_set):
+    return tuple(min((a * shingle + b) % _MERSENNE_PRIME for shingle in shingle_set)
+                 for a, b in _PERMUTATIONS)
+
+
+def estimated_similarity(signature_a, signature_b):
+    """Estimate the Jaccard similarity of two shingle sets from their MinHash signatures."""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+
+class DuplicateIndex:
+    """
+    Index of the duplicated files of a folder tree.
+
+    Files are visited in a fixed order (folders by path, files by name); the first file with
+    a given content is its representative, and later files with the same content hash are
+    duplicates of it. With near=True, files whose MinHash signature is close enough to a
+    representative's (banded LSH, then NEAR_DUP_THRESHOLD) are near-duplicates of it.
+    Only files worth at least DEDUP_MIN_TOKENS tokens are indexed, and each duplicate is
+    counted once in dedup_stats as it is indexed.
+    """
+
+    def __init__(self, near=False, threshold=NEAR_DUP_THRESHOLD, min_tokens=DEDUP_MIN_TOKENS):
+        self.near = near
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self._duplicates = {}
+        self._digests = {}
+        self._representatives = {}
+        self._signatures = {}
+        self._buckets = {}
+        self._folders = {}
+        self.root_path = None
+
+    def index_tree(self, tree, fingerprints=None):
+        """
+        Index the files of the tree. With 'fingerprints' (folder keys to content fingerprints),
+        only the first of several identical folders is indexed: the others share its summary,
+        and whichever of them is summarized first builds its prompt from the first folder's
+        files (see folder_source), so the prompt does not depend on scheduling.
+        """
+        self.root_path = tree.path
+        seen_folders = set()
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            fingerprint = fingerprints.get(node_key(node, tree)) if fingerprints else None
+            if fingerprint is not None:
+                if fingerprint in seen_folders:
+                    continue
+                seen_folders.add(fingerprint)
+                self._folders[fingerprint] = node
+            node_path = node.path
+            for file_name in sorted(node.files):
+                if should_process_file_content(file_name):
+                    self._index_file(os.path.join(node_path, file_name))
+            stack.extend(sorted(node.subfolders, key=lambda child: child.name, reverse=True))
+        return self
+
+    def _index_file(self, file_path):
+        try:
+            size = get_size(file_path)
+            if size / CHARS_PER_TOKEN < self.min_tokens:
+                return
+            # Usually already computed by the fingerprinting pass (see ingest.file_digests).
+            digest = file_digest(file_path)
+        except OSError:
+            return
+        self._digests[file_path] = digest
+        representative = self._representatives.get(digest)
+        if representative is not None:
+            self._add_duplicate(file_path, size, (representative, 1.0))
+            return
+        if self.near and size <= NEAR_DUP_MAX_BYTES:
+            content, _, is_placeholder = ingest_file(file_path)
+            if not is_placeholder:
+                signature = minhash_signature(shingles(content))
+                match = self._find_near_duplicate(signature)
+                if match is not None:
+                    self._add_duplicate(file_path, size, match)
+                    return
+                self._add_signature(file_path, signature)
+        self._representatives[digest] = file_path
+
+    def _add_duplicate(self, file_path, size, match):
+        """Record a duplicate and count it once in dedup_stats, however often its prompt block is built."""
+        self._duplicates[file_path] = match
+        header = f"--- {os.path.basename(file_path)} ---\n"
+        saved = int(size / CHARS_PER_TOKEN) - estimate_tokens(header + self._reference_note(file_path) + ">\n")
+        if match[1] >= 1.0:
+            dedup_stats.add(tokens=saved, identical_files=1)
+        else:
+            dedup_stats.add(tokens=saved, near_duplicate_files=1)
+
+    def _find_near_duplicate(self, signature):
+        best = None
+        for band in range(NUM_BANDS):
+            rows = signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]
+            for candidate in self._buckets.get((band, rows), ()):
+                similarity = estimated_similarity(signature, self._signatures[candidate])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (candidate, similarity)
+        return best
+
+    def _add_signature(self, file_path, signature):
+        self._signatures[file_path] = signature
+        for band in range(NUM_BANDS):
+            rows = signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]
+            self._buckets.setdefault((band, rows), []).append(file_path)
+
+    def folder_source(self, fingerprint, node):
+        """Return the indexed folder whose files stand for every folder with this fingerprint."""
+        return self._folders.get(fingerprint, node)
+
+    def lookup(self, file_path):
+        """Return (representative path, similarity) if the file is a duplicate, else None."""
+        return self._duplicates.get(file_path)
+
+    def collapsed_block(self, file_path, header):
+        """
+        Return the prompt block replacing a duplicate file: a reference to its representative
+        and the content hash of the representative. The block only depends on the tree, so
+        prompts (and their cache keys) are the same from one run to the next.
+        Returns None if the file is not a duplicate.
+        """
+        if self.lookup(file_path) is None:
+            return None
+        return header + self._reference_note(file_path) + ">\n"
+
+    def _reference_note(self, file_path):
+        representative, similarity = self._duplicates[file_path]
+        relative = os.path.relpath(representative, self.root_path).replace(os.sep, "/")
+        digest = self._digests[representative][:12]
+        if similarity >= 1.0:
+            return f"<Identical to '{relative}' (sha256 {digest}); content omitted"
+        return f"<Near-duplicate (~{similarity:.0%} similar) of '{relative}' (sha256 {digest}); content omitted"
@@ -0,0 +1,51 @@
+import queue
+import threading
+
+
+class EventStream:
+    """
+    Publishes progress events of running summaries to any number of subscribers.
+
+    Events are dicts with a 'type':
+      - 'token':  {'call', 'text'} — a piece of a model answer as it is generated
+                  (only streamed while a subscriber asked for tokens);
+      - 'node':   {'root', 'key', 'name', 'summary', 'outcome', 'done', 'total'} — a folder
+                  summary finished (bottom-up, so leaves come first); 'root' is the path of
+                  the summarized tree and 'outcome' is summarized, reused or duplicate.
+    Each subscriber gets its own queue; publishing never blocks, and events that do not fit
+    in a full queue are dropped for that subscriber.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, tokens=False, maxsize=10000):
+        """Return a new queue receiving the events; with tokens=True it also gets 'token' events."""
+        events = queue.Queue(maxsize=maxsize)
+        with self._lock:
+            self._subscribers[events] = tokens
+        return events
+
+    def unsubscribe(self, events):
+        with self._lock:
+            self._subscribers.pop(events, None)
+
+    def wants_tokens(self):
+        """True while at least one subscriber listens to 'token' events."""
+        return any(self._subscribers.values())
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for events, tokens in subscribers:
+            if event["type"] == "token" and not tokens:
+                continue
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+
+# Shared stream of the process' summarization events.
+summary_events = EventStream()
@@ -0,0 +1,209 @@
+import os
+import re
+import ast
+
+# -----------------------------
+# Structural Extraction Settings
+# -----------------------------
+# When folder prompts send file skeletons (signatures, docstrings, imports) instead of full
+# file contents: 'off' never, 'auto' only for folders whose files do not fit in one prompt,
+# 'always' for every file that has an extractor.
+SKELETON_MODES = ('off', 'auto', 'always')
+SKELETON_MODE = os.environ.get("SUMMARY_SKELETON_MODE", "auto")
+# Docstrings kept in skeletons are cut to this many lines.
+MAX_DOC_LINES = int(os.environ.get("SUMMARY_SKELETON_DOC_LINES", 6))
+# Constant values longer than this (long literals, tables, fixtures) are replaced by '...'.
+MAX_VALUE_CHARS = 80
+# Blocks of C-like languages whose members are kept in skeletons.
+_CONTAINER = re.compile(r"\b(class|struct|interface|enum|namespace|union)\b")
+
+
+def set_skeleton_mode(mode):
+    """Change when file skeletons replace file contents (see SKELETON_MODES)."""
+    global SKELETON_MODE
+    if mode not in SKELETON_MODES:
+        raise ValueError(f"Unknown skeleton mode '{mode}' (expected one of {', '.join(SKELETON_MODES)})")
+    SKELETON_MODE = mode
+
+
+def _short_doc(doc, indent):
+    lines = doc.strip().splitlines()
+    if len(lines) > MAX_DOC_LINES:
+        lines = lines[:MAX_DOC_LINES] + ["..."]
+    body = "\n".join(indent + line.strip() if i else line.strip() for i, line in enumerate(lines))
+    return f'{indent}"""{body}"""'
+
+
+def _short_value(node):
+    text = ast.unparse(node)
+    return text if len(text) <= MAX_VALUE_CHARS else "..."
+
+
+def _python_lines(statements, indent=""):
+    lines = []
+    for statement in statements:
+        if isinstance(statement, (ast.Import, ast.ImportFrom)):
+            lines.append(indent + ast.unparse(statement))
+        elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            for decorator in statement.decorator_list:
+                lines.append(f"{indent}@{_short_value(decorator)}")
+            if isinstance(statement, ast.ClassDef):
+                bases = [ast.unparse(base) for base in statement.bases]
+                bases += [ast.unparse(keyword) for keyword in statement.keywords]
+                lines.append(f"{indent}class {statement.name}" + (f"({', '.join(bases)})" if bases else "") + ":")
+            else:
+                prefix = "async def" if isinstance(statement, ast.AsyncFunctionDef) else "def"
+                returns = f" -> {ast.unparse(statement.returns)}" if statement.returns else ""
+                lines.append(f"{indent}{prefix} {statement.name}({ast.unparse(statement.args)}){returns}:")
+            doc = ast.get_docstring(statement)
+            if doc:
+                lines.append(_short_doc(doc, indent + "    "))
+            if isinstance(statement, ast.ClassDef):
+                members = _python_lines(statement.body, indent + "    ")
+                lines.extend(members or ([] if doc else [indent + "    ..."]))
+            else:
+                lines.append(indent + "    ...")
+        elif isinstance(statement, (ast.Assign, ast.AnnAssign)):
+            targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+            names = " = ".join(ast.unparse(target) for target in targets)
+            annotation = f": {ast.unparse(statement.annotation)}" if isinstance(statement, ast.AnnAssign) else ""
+            value = f" = {_short_value(statement.value)}" if statement.value is not None else ""
+            lines.append(f"{indent}{names}{annotation}{value}")
+        elif isinstance(statement, ast.If) and ast.unparse(statement.test) == "__name__ == '__main__'":
+            lines.append(f"{indent}if __name__ == '__main__':\n{indent}    ...")
+    return lines
+
+
+def python_skeleton(text):
+    """
+    Return the structure of a Python module: its docstring, imports, constants (long values
+    elided), classes with their bases and decorators, and function signatures with their
+    docstrings; bodies are replaced by '...'. Returns None if the text is not valid Python.
+    """
+    try:
+        module = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    lines = []
+    doc = ast.get_docstring(module)
+    if doc:
+        lines.append(_short_doc(doc, ""))
+    lines.extend(_python_lines(module.body))
+    return "\n".join(lines) + "\n"
+
+
+def _code_braces(line, state):
+    """
+    Return the braces of one line of C-like code, skipping those inside string, character
+    and template literals and comments. 'state' holds the literal or comment still open at
+    the end of the previous line ('/*', '`', or a quote continued by a backslash), or None.
+    Returns (braces, state at the end of the line).
+    """
+    braces = []
+    i, length = 0, len(line)
+    while i < length:
+        char = line[i]
+        if state == "/*":
+            end = line.find("*/", i)
+            if end == -1:
+                return braces, state
+            i, state = end + 2, None
+            continue
+        if state is not None:
+            if char == "\\":
+                i += 2
+                continue
+            if char == state:
+                state = None
+            i += 1
+            continue
+        if line.startswith("//", i):
+            return braces, None
+        if line.startswith("/*", i):
+            state = "/*"
+            i += 2
+            continue
+        if char in "\"'`":
+            state = char
+        elif char in "{}":
+            braces.append(char)
+        i += 1
+    # Only block comments, template literals and backslash-continued strings span lines.
+    if state in ('"', "'") and not line.endswith("\\"):
+        state = None
+    return braces, state
+
+
+def brace_skeleton(text):
+    """
+    Return the outline of a C-like source file (C, C++, Java, JavaScript, TypeScript): top-level
+    lines and the members of classes, structs, interfaces and namespaces are kept, function
+    and other block bodies are replaced by '...', and a leading license comment is dropped.
+    Braces inside literals and comments are ignored; returns None if the braces do not balance.
+    """
+    stripped = text.lstrip()
+    if stripped.startswith("/*"):
+        end = stripped.find("*/")
+        header = stripped[:end].lower()
+        if end != -1 and ("license" in header or "copyright" in header):
+            text = stripped[end + 2:]
+    lines = []
+    # One entry per open brace: True if it opened a container whose members are kept.
+    blocks = []
+    elided = False
+    state = None
+    for line in text.splitlines():
+        body = line.strip()
+        # A line starting with closing braces is judged at the depth it brings back.
+        closing = len(body) - len(body.lstrip("}")) if state is None else 0
+        if all(blocks[:len(blocks) - closing] if closing else blocks):
+            if body:
+                lines.append(line.rstrip())
+            elided = False
+        elif not elided:
+            lines.append(line[:len(line) - len(line.lstrip())] + "...")
+            elided = True
+        container = bool(_CONTAINER.search(line))
+        braces, state = _code_braces(line, state)
+        for char in braces:
+            if char == "{":
+                blocks.append(container)
+                container = False
+            elif not blocks:
+                return None
+            else:
+                blocks.pop()
+    if blocks or state is not None:
+        return None
+    return "\n".join(lines) + "\n"
+
+
+# Extractors by language tag (see files_exclusion.LANGUAGE_TAGS). Each takes a file's text
+# and returns its skeleton, or None when it cannot parse it.
+EXTRACTORS = {
+    'python': python_skeleton,
+    'javascript': brace_skeleton,
+    'typescript': brace_skeleton,
+    'java': brace_skeleton,
+    'c': brace_skeleton,
+    'cpp': brace_skeleton,
+}
+
+
+def register_extractor(language, extractor):
+    """Use 'extractor(text) -> skeleton or None' for the files of 'language'."""
+    EXTRACTORS[language] = extractor
+
+
+def extract_skeleton(text, language):
+    """
+    Return the skeleton of 'text' written in 'language', or None if there is no extractor
+    for that language, it failed, or the skeleton would not be smaller than the text.
+    """
+    extractor = EXTRACTORS.get(language)
+    if extractor is None:
+        return None
+    skeleton = extractor(text)
+    if skeleton is None or len(skeleton) >= len(text):
+        return None
+    return skeleton
@@ -28,7 +28,7 @@ EXCLUDED_EXTENSIONS = {
     '.pickle'
 }
 
-# Mapping file extensions to language tags for code blocks.
+# Mapping file extensions to language tags for code blocks, chunking and skeleton extraction.
 LANGUAGE_TAGS = {
     '.py': 'python',
     '.js': 'javascript',
@@ -65,17 +65,30 @@ def should_process_file_content(file_name):
     _, ext = os.path.splitext(file_name)
     return ext.lower() not in EXCLUDED_EXTENSIONS
 
+def load_gitignore_file(gitignore_path):
+    """
+    Load and compile the patterns of a single .gitignore-style file.
+    Returns a pathspec.PathSpec object or None if the file does not exist.
+    """
+    if not os.path.exists(gitignore_path):
+        return None
+    try:
+        with open(gitignore_path, 'r', encoding='utf-8', errors='replace') as f:
+            patterns = f.read().splitlines()
+    except OSError:
+        return None
+    return pathspec.PathSpec.from_lines('gitwildmatch', patterns)
+
 def load_gitignore(repo_root):
     """
     Load and compile .gitignore patterns from the repository root.
     Returns a pathspec.PathSpec object or None if no .gitignore is found.
     """
-    gitignore_path = os.path.join(repo_root, '.gitignore')
-    if os.path.exists(gitignore_path):
-        with open(gitignore_path, 'r') as f:
-            patterns = f.read().splitlines()
-        return pathspec.PathSpec.from_lines('gitwildmatch', patterns)
-    return None
+    return load_gitignore_file(os.path.join(repo_root, '.gitignore'))
+
+def load_git_info_exclude(repo_root):
+    """Load the repository-local exclude patterns from .git/info/exclude, if any."""
+    return load_gitignore_file(os.path.join(repo_root, '.git', 'info', 'exclude'))
 
 def should_exclude_by_gitignore(relative_path, gitignore_spec):
     """
@@ -85,4 +98,33 @@ def should_exclude_by_gitignore(relative_path, gitignore_spec):
     if gitignore_spec is None:
         return False
     posix_path = relative_path.replace(os.sep, '/')
-    return gitignore_spec.match_file(posix_path)
\ No newline at end of file
+    return gitignore_spec.match_file(posix_path)
+
+def _check_spec(spec, path):
+    """Return True (ignored), False (re-included by a '!' pattern) or None (no pattern matches)."""
+    if hasattr(spec, 'check_file'):
+        return spec.check_file(path).include
+    return True if spec.match_file(path) else None
+
+def is_ignored(relative_path, specs, is_dir=False):
+    """
+    Return True if 'relative_path' (POSIX, relative to the repo root) is ignored by the
+    stack of gitignore specs that apply to it.
+
+    'specs' is a sequence of (base_dir, spec) pairs ordered from the repo root down, where
+    each spec's patterns are relative to its base_dir ('' for the root). As in git, the
+    deepest .gitignore with a matching pattern decides.
+    """
+    for base_dir, spec in reversed(specs):
+        if base_dir:
+            if not relative_path.startswith(base_dir + '/'):
+                continue
+            path = relative_path[len(base_dir) + 1:]
+        else:
+            path = relative_path
+        if is_dir:
+            path += '/'
+        result = _check_spec(spec, path)
+        if result is not None:
+            return result
+    return False
@@ -1,80 +1,221 @@
 import os
+import threading
 
-from .process_file import read_file_content, process_file
-from .files_exclusion import should_process_file_content
+from .process_file import process_file
+from .ingest import ingest_file
+from .files_exclusion import should_process_file_content, LANGUAGE_TAGS
+from . import extractors
 from .genai_summary import generate_summary
+from .scheduler import run_bottom_up, run_parallel
+from .folder_tree import node_key, iter_flatten_tree
+from .tokens import estimate_tokens, pack_items, PROMPT_TOKEN_BUDGET
+from .reduce import reduce_summaries
+from .dedup import folder_memo, dedup_stats
+from .profiling import profiler
+from .events import summary_events
 
-LANGUAGE_TAGS = {
-    '.py': 'python',
-    '.js': 'javascript',
-    '.ts': 'typescript',
-    '.java': 'java',
-    '.c': 'c',
-    '.cpp': 'cpp',
-    '.html': 'html',
-    '.css': 'css',
-    '.sh': 'bash',
-}
 
+SUMMARY_HEADER = "Folder '{name}' summary:\n"
 
-def summarize_folder(node):
+
+def folder_summary_text(node):
+    """Return the generated summary stored on node.summary, without the folder header."""
+    if node.summary is None:
+        return None
+    header = SUMMARY_HEADER.format(name=node.name)
+    if node.summary.startswith(header):
+        return node.summary[len(header):]
+    return node.summary
+
+
+def summarize_folder(node, max_workers=None, reuse=None, on_summary=None, fingerprints=None, duplicates=None):
     """
-    Recursively traverse the folder tree (bottom-up) and generate a summary.
+    Traverse the folder tree (bottom-up) and generate a summary for every folder.
 
     For each folder:
       1. Process subfolders first (their summaries are aggregated).
       2. Process the folder’s own files:
          - For files with allowed extensions, include their content (with appropriate code blocks).
          - For files with excluded extensions, include only the file name and a placeholder.
-      3. If the aggregated text is huge (over 20k words), process each file using process_file.
+      3. If the aggregated text exceeds the prompt token budget, pack the files into prompts
+         that fit it (see summarize_in_packs).
       4. Compute the final text’s word count and store it in the folder summary.
 
-    The function returns the final aggregated text for the folder.
+    Folders whose subfolders are all done are summarized concurrently, using up to
+    max_workers threads (defaults to the scheduler's max_concurrency).
+    'reuse' optionally maps folder keys (see node_key) to summaries from a previous run;
+    those folders are not summarized again.
+    'on_summary', if given, is called as on_summary(folder, summary) from the worker thread
+    as soon as each folder has been newly summarized (e.g. to checkpoint it).
+    'fingerprints' optionally maps folder keys to content fingerprints (see
+    incremental.compute_fingerprints); folders with identical contents are then summarized
+    only once. 'duplicates', a dedup.DuplicateIndex, collapses duplicated files in prompts.
+    Every finished folder is also published as a 'node' event on events.summary_events.
+    The function returns the final aggregated text for the root folder.
     """
-    # Process subfolders recursively.
-    aggregated_subfolder_text = ""
-    for subfolder in node.subfolders:
-        sub_text = summarize_folder(subfolder)
-        aggregated_subfolder_text += f"\n### Subfolder '{subfolder.name}' ---\n{sub_text}\n"
-
-    # Process current folder's own files.
-    raw_file_texts = []
-    for file_name in node.files:
-        file_path = os.path.join(node.path, file_name)
-        _, ext = os.path.splitext(file_name)
-        header = f"--- {file_name} ---\n"
-        if should_process_file_content(file_name):
-            content = read_file_content(file_path)
-            language_tag = LANGUAGE_TAGS.get(ext.lower(), '')
-            if language_tag:
-                block = f"```{language_tag}\n{content}\n```\n"
-            else:
-                block = f"```\n{content}\n```\n"
+    total = sum(1 for _ in iter_flatten_tree(node))
+    progress = {"done": 0}
+    progress_lock = threading.Lock()
+
+    def process_node(current, subfolder_texts):
+        key = node_key(current, node)
+        with profiler.span("folder", key=key, files=len(current.files)) as span:
+            summary, outcome = summarize_or_reuse(current, key, subfolder_texts)
+            span.set(outcome=outcome)
+        with progress_lock:
+            progress["done"] += 1
+            done = progress["done"]
+        summary_events.publish({"type": "node", "root": node.path, "key": key, "name": current.name,
+                                "summary": summary, "outcome": outcome, "done": done, "total": total})
+        return summary
+
+    def summarize_or_reuse(current, key, subfolder_texts):
+        previous = reuse.get(key) if reuse else None
+        if previous is not None:
+            current.summary = SUMMARY_HEADER.format(name=current.name) + previous
+            return previous, "reused"
+        outcome = "summarized"
+        fingerprint = fingerprints.get(key) if fingerprints else None
+        if fingerprint is None:
+            summary = summarize_node(current, subfolder_texts, duplicates)
         else:
-            block = (f"<File '{file_name}' with extension '{ext}' is excluded from processing; "
-                     "only file name is included>\n")
-        raw_file_texts.append(header + block)
-    combined_raw_text = "\n".join(raw_file_texts) + "\n" + aggregated_subfolder_text
-    total_words = len(combined_raw_text.split())
-    # If the folder's aggregated text is huge, summarize each file separately.
-    if total_words > 20000:
-        summarized_file_texts = []
-        for file_name in node.files:
-            file_path = os.path.join(node.path, file_name)
-            _, ext = os.path.splitext(file_name)
-            if should_process_file_content(file_name):
-                summarized = process_file(file_path)
-            else:
-                summarized = (f"<File '{file_name}' with extension '{ext}' is excluded from content summarization; "
-                              "only file name is included.>")
-            summarized_file_texts.append(f"--- {file_name} ---\n{summarized}\n")
-        full_text_summary = generate_summary("\n".join(summarized_file_texts))
+            # Identical folders share one summary; its prompt is always built from the same
+            # (first indexed) copy, whichever of them gets here first.
+            source = duplicates.folder_source(fingerprint, current) if duplicates is not None else current
+            summary, computed = folder_memo.get_or_compute(
+                fingerprint, lambda: summarize_node(current, subfolder_texts, duplicates, files_from=source))
+            if not computed:
+                current.summary = SUMMARY_HEADER.format(name=current.name) + summary
+                dedup_stats.add(calls=1, reused_folders=1)
+                outcome = "duplicate"
+        if on_summary is not None:
+            on_summary(current, summary)
+        return summary, outcome
+    return run_bottom_up(node, process_node, max_workers=max_workers)
+
+
+def folder_call_type(node):
+    """Call type of a folder's summary for model routing: 'root' for the top folder."""
+    return "root" if node.parent is None else "folder"
+
+
+def summarize_node(node, subfolder_texts, duplicates=None, files_from=None):
+    """
+    Summarize a single folder, given the summaries already produced for its subfolders
+    (in the order of node.subfolders). Stores the result on node.summary and returns it.
+    'files_from', a folder with identical contents, is the one whose files are read instead.
+    """
+    source = files_from or node
+    subfolder_blocks = [f"\n### Subfolder '{subfolder.name}' ---\n{sub_text}\n"
+                        for subfolder, sub_text in zip(node.subfolders, subfolder_texts)]
+    aggregated_subfolder_text = "".join(subfolder_blocks)
+
+    # Ingest the folder's own files in a single pass. File texts are only kept while the
+    # folder still fits in one prompt; past that point files are just measured, and the
+    # packs re-read them on demand, so memory stays bounded by the prompt budget.
+    budget = PROMPT_TOKEN_BUDGET - estimate_tokens(aggregated_subfolder_text)
+
+    def ingest_files(skeleton):
+        file_blocks = []
+        total_tokens = 0
+        for file_name in source.files:
+            block, tokens = build_file_block(source, file_name, retain=total_tokens <= budget,
+                                             duplicates=duplicates, skeleton=skeleton)
+            total_tokens += tokens
+            file_blocks.append((file_name, block, tokens))
+        return file_blocks, total_tokens
+
+    skeleton = extractors.SKELETON_MODE == 'always'
+    file_blocks, total_tokens = ingest_files(skeleton)
+    if total_tokens > budget and extractors.SKELETON_MODE == 'auto':
+        # Too large for one prompt: send the structure of the source files instead of
+        # their full contents, which usually makes the folder fit again.
+        skeleton = True
+        file_blocks, total_tokens = ingest_files(skeleton)
+    # If the folder's aggregated text does not fit in one prompt, pack its files into prompts that do.
+    if total_tokens > budget:
+        full_text_summary = summarize_in_packs(source, file_blocks, subfolder_blocks, duplicates, skeleton)
     else:
-        full_text_summary = generate_summary(combined_raw_text)
-
-    node.summary = (
-        f"Folder '{node.name}' summary:\n"
-        f"{full_text_summary}"
-    )
-    print(node.summary)
-    return full_text_summary
\ No newline at end of file
+        raw_file_texts = [block for _, block, _ in file_blocks]
+        combined_raw_text = "\n".join(raw_file_texts) + "\n" + aggregated_subfolder_text
+        full_text_summary = generate_summary(combined_raw_text, call_type=folder_call_type(node))
+
+    node.summary = SUMMARY_HEADER.format(name=node.name) + full_text_summary
+    if not summary_events.wants_tokens():
+        # When answers are streamed, the summary has already been shown as it was generated.
+        print(node.summary)
+    return full_text_summary
+
+def build_file_block(node, file_name, retain=True, duplicates=None, skeleton=False):
+    """
+    Build the prompt block of one file of 'node': a header plus its content in a code block
+    tagged with its language, or a placeholder for excluded, binary and oversized files.
+    A file listed as a duplicate in 'duplicates' is replaced by a reference to its
+    representative and the representative's summary. With skeleton=True, source files with
+    an extractor (see extractors.EXTRACTORS) are reduced to their structure.
+    Returns (block, tokens); block is None when retain=False and the content was only measured.
+    """
+    file_path = os.path.join(node.path, file_name)
+    _, ext = os.path.splitext(file_name)
+    header = f"--- {file_name} ---\n"
+    if not should_process_file_content(file_name):
+        block = header + (f"<File '{file_name}' with extension '{ext}' is excluded from processing; "
+                          "only file name is included>\n")
+        return block, estimate_tokens(block)
+    if duplicates is not None:
+        block = duplicates.collapsed_block(file_path, header)
+        if block is not None:
+            return block, estimate_tokens(block)
+    language_tag = LANGUAGE_TAGS.get(ext.lower(), '')
+    skeleton = skeleton and language_tag in extractors.EXTRACTORS
+    with profiler.span("read_file", path=file_path) as span:
+        # A skeleton is extracted from the full text, which is then dropped if not retained.
+        content, tokens, is_placeholder = ingest_file(file_path, retain=retain or skeleton)
+        span.set(tokens=tokens)
+    if is_placeholder:
+        block = header + content + "\n"
+        return block, estimate_tokens(block)
+    if skeleton:
+        structure = extractors.extract_skeleton(content, language_tag)
+        if structure is not None:
+            header = f"--- {file_name} (structure only: imports, signatures and docstrings) ---\n"
+            content, tokens = structure, estimate_tokens(structure)
+        if not retain:
+            content = None
+    fence = f"```{language_tag}\n"
+    tokens += estimate_tokens(header + fence + "\n```\n")
+    if content is None:
+        return None, tokens
+    return f"{header}{fence}{content}\n```\n", tokens
+
+
+def summarize_in_packs(node, file_blocks, subfolder_blocks, duplicates, skeleton=False):
+    """
+    Summarize a folder too large for a single prompt.
+
+    Files are packed greedily, in order, into prompts filling the token budget and each pack
+    is summarized; a file too large for a prompt of its own goes through process_file
+    (chunked summarization). The pack and file summaries are then reduced together with
+    the subfolder summaries (see reduce_summaries), so no prompt exceeds the budget
+    however many files and subfolders the folder has.
+    """
+    oversized = [file_name for file_name, _, tokens in file_blocks if tokens > PROMPT_TOKEN_BUDGET]
+    fitting = [entry for entry in file_blocks if entry[2] <= PROMPT_TOKEN_BUDGET]
+    packs = pack_items(fitting, PROMPT_TOKEN_BUDGET, size=lambda entry: entry[2])
+
+    def summarize_pack(pack):
+        texts = []
+        for file_name, block, _ in pack:
+            if block is None:
+                block, _ = build_file_block(node, file_name, duplicates=duplicates, skeleton=skeleton)
+            texts.append(block)
+        pack_summary = generate_summary("\n".join(texts), call_type="file")
+        return f"--- Summary of {len(pack)} file(s) ---\n{pack_summary}\n"
+
+    def summarize_oversized(file_name):
+        with profiler.span("process_file", path=os.path.join(node.path, file_name)):
+            return f"--- {file_name} ---\n{process_file(os.path.join(node.path, file_name))}\n"
+
+    partial_summaries = run_parallel(summarize_pack, packs)
+    partial_summaries += run_parallel(summarize_oversized, oversized)
+    return reduce_summaries(partial_summaries + subfolder_blocks, call_type=folder_call_type(node))
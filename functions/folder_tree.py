@@ -1,63 +1,223 @@
 import os
+import sys
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-from .files_exclusion import should_process_file_content, should_exclude_by_gitignore, should_exclude_file, should_exclude_dir, EXCLUDED_DIRS
+from .files_exclusion import should_exclude_file, should_exclude_dir, is_ignored, load_gitignore_file, load_git_info_exclude
 
 class FolderNode:
-    def __init__(self, name, path):
-        self.name = name          # Folder name
-        self.path = path          # Full folder path
-        self.files = []           # List of file names in this folder
-        self.subfolders = []      # List of child FolderNode objects
-        self.summary = None       # Final summary text for the folder
+    """
+    A folder of the summarized tree.
+
+    Nodes use __slots__ and interned names to stay small on trees with many folders. Only
+    root nodes store their full path; a child's path is derived from its parent chain.
+    """
+    __slots__ = ('name', 'parent', '_path', 'files', 'subfolders', 'summary')
+
+    def __init__(self, name, path=None, parent=None):
+        self.name = sys.intern(name)  # Folder name
+        self.parent = parent          # Parent FolderNode (None for the root)
+        self._path = path             # Full folder path, only stored for roots
+        self.files = []               # List of file names in this folder
+        self.subfolders = []          # List of child FolderNode objects
+        self.summary = None           # Final summary text for the folder
+
+    @property
+    def path(self):
+        """Full folder path."""
+        parts = []
+        node = self
+        while node._path is None:
+            parts.append(node.name)
+            node = node.parent
+        return os.path.join(node._path, *reversed(parts))
 
     def add_subfolder(self, subfolder):
+        subfolder.parent = self
         self.subfolders.append(subfolder)
 
     def add_file(self, file_name):
-        self.files.append(file_name)
+        self.files.append(sys.intern(file_name))
 
     def __repr__(self):
         return f"<FolderNode name={self.name} files={len(self.files)} subfolders={len(self.subfolders)}>"
 
-def build_folder_tree(path, repo_root, gitignore_spec):
+# Marker telling _scan_folder to look for a .gitignore in the folder it scans.
+_FROM_DISK = object()
+
+def build_folder_tree(path, repo_root, gitignore_spec=None, max_workers=None, use_git=False):
     """
-    Recursively build a tree of FolderNode objects starting at 'path',
+    Build a tree of FolderNode objects starting at 'path',
     applying all exclusion rules (hidden files/folders, forbidden names, and .gitignore).
+
+    Every .gitignore met during the walk applies to its folder and below, on top of
+    .git/info/exclude, and ignored folders are pruned before being scanned.
+    'gitignore_spec', if given, is used instead of reading the root .gitignore.
+    With max_workers > 1, folders are scanned concurrently on a thread pool.
+    With use_git=True, the file list of a git checkout is taken from `git ls-files`
+    instead of walking the file system.
+    """
+    if use_git:
+        tree = build_folder_tree_from_git(path, repo_root)
+        if tree is not None:
+            return tree
+    root = FolderNode(name=os.path.basename(path) or path, path=path)
+    root_rel = os.path.relpath(path, repo_root).replace(os.sep, '/')
+    root_rel = '' if root_rel == '.' else root_rel
+    root_specs = ()
+    exclude_spec = load_git_info_exclude(repo_root)
+    if exclude_spec is not None:
+        root_specs = (('', exclude_spec),)
+    root_task = (root, root_rel, root_specs, gitignore_spec if gitignore_spec is not None else _FROM_DISK)
+
+    if max_workers and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = {pool.submit(_scan_folder, *root_task)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for task in future.result():
+                        pending.add(pool.submit(_scan_folder, *task))
+    else:
+        stack = [root_task]
+        while stack:
+            stack.extend(_scan_folder(*stack.pop()))
+    return root
+
+def _scan_folder(node, rel_dir, specs, local_spec=_FROM_DISK):
+    """
+    Fill 'node' with the files and (still empty) subfolders of its directory that are not
+    excluded, and return the scan tasks of those subfolders.
     """
-    node = FolderNode(name=os.path.basename(path) or path, path=path)
     try:
-        with os.scandir(path) as it:
-            for entry in it:
-                rel_path = os.path.relpath(entry.path, repo_root)
-                if should_exclude_by_gitignore(rel_path, gitignore_spec):
-                    continue
-
-                if entry.is_dir(follow_symlinks=False):
-                    if should_exclude_dir(entry.name):
-                        continue
-                    child = build_folder_tree(entry.path, repo_root, gitignore_spec)
-                    node.add_subfolder(child)
-                elif entry.is_file(follow_symlinks=False):
-                    # Exclude the analysis script itself.
-                    if should_exclude_file(entry.name):
-                        continue
-                    node.add_file(entry.name)
+        with os.scandir(node.path) as it:
+            entries = list(it)
     except PermissionError:
-        print(f"Permission denied: {path}")
-    return node
+        print(f"Permission denied: {node.path}")
+        return []
+    if local_spec is _FROM_DISK:
+        local_spec = None
+        if any(entry.name == '.gitignore' for entry in entries):
+            local_spec = load_gitignore_file(os.path.join(node.path, '.gitignore'))
+    if local_spec is not None:
+        specs = specs + ((rel_dir, local_spec),)
+
+    tasks = []
+    for entry in entries:
+        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if should_exclude_dir(entry.name) or is_ignored(rel_path, specs, is_dir=True):
+                continue
+            child = FolderNode(name=entry.name)
+            node.add_subfolder(child)
+            tasks.append((child, rel_path, specs))
+        elif entry.is_file(follow_symlinks=False):
+            # Exclude the analysis script itself.
+            if should_exclude_file(entry.name) or is_ignored(rel_path, specs):
+                continue
+            node.add_file(entry.name)
+    return tasks
+
+def _git_ls_files(repo_root, *args):
+    result = subprocess.run(["git", "ls-files", "-z", *args], cwd=repo_root, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return [entry for entry in result.stdout.decode('utf-8', errors='replace').split('\0') if entry]
+
+def build_folder_tree_from_git(path, repo_root):
+    """
+    Build the folder tree of a git checkout from `git ls-files` (tracked files plus untracked
+    files that are not ignored), without walking the file system. Hidden and excluded names
+    are still filtered out. Returns None if 'path' is not inside a git checkout.
+    """
+    try:
+        staged = _git_ls_files(path, "--stage", "--cached")
+        untracked = _git_ls_files(path, "--others", "--exclude-standard")
+    except (subprocess.CalledProcessError, OSError):
+        return None
+    paths = []
+    for entry in staged:
+        mode_and_hash, _, file_path = entry.partition('\t')
+        # Mode 160000 marks a submodule, which is a folder rather than a file.
+        if not mode_and_hash.startswith('160000'):
+            paths.append(file_path)
+    paths.extend(untracked)
+
+    root = FolderNode(name=os.path.basename(path) or path, path=path)
+    folders = {'': root}
+    for file_path in paths:
+        *dir_parts, file_name = file_path.split('/')
+        if should_exclude_file(file_name) or any(should_exclude_dir(part) for part in dir_parts):
+            continue
+        node = root
+        rel_dir = ''
+        for part in dir_parts:
+            rel_dir = f"{rel_dir}/{part}" if rel_dir else part
+            child = folders.get(rel_dir)
+            if child is None:
+                child = FolderNode(name=part)
+                node.add_subfolder(child)
+                folders[rel_dir] = child
+            node = child
+        node.add_file(file_name)
+    return root
+
+def node_key(node, root):
+    """
+    Return a stable identifier for 'node' within the tree rooted at 'root':
+    its POSIX path relative to the root folder ('.' for the root itself).
+    """
+    return os.path.relpath(node.path, root.path).replace(os.sep, '/')
 
 # -----------------------------
 # Utility: Flatten the Summary Tree
 # -----------------------------
+def iter_flatten_tree(node, prefix=""):
+    """
+    Iteratively yield (hierarchical name, summary) pairs for every folder of the tree,
+    parents before children, without building the whole mapping in memory.
+    """
+    stack = [(node, prefix)]
+    while stack:
+        current, parent_name = stack.pop()
+        if parent_name:
+            full_name = parent_name + " > " + current.name
+        else:
+            full_name = current.name
+        yield full_name, current.summary
+        for child in reversed(current.subfolders):
+            stack.append((child, full_name))
+
 def flatten_tree(node, prefix=""):
     """
-    Recursively flatten the folder tree into a dict mapping hierarchical names to summaries.
+    Flatten the folder tree into a dict mapping hierarchical names to summaries.
     """
-    if prefix:
-        full_name = prefix + " > " + node.name
-    else:
-        full_name = node.name
-    results = {full_name: node.summary}
-    for child in node.subfolders:
-        results.update(flatten_tree(child, prefix=full_name))
-    return results
\ No newline at end of file
+    return dict(iter_flatten_tree(node, prefix))
+
+def write_flattened_tree(node, f, indent=2):
+    """
+    Stream the flattened summary tree to the open text file 'f' as a JSON object,
+    one entry at a time, producing the same output as json.dump(flatten_tree(node), f, indent=2).
+    """
+    padding = " " * indent
+    empty = True
+    f.write("{")
+    for full_name, summary in iter_flatten_tree(node):
+        f.write("\n" if empty else ",\n")
+        f.write(f"{padding}{json.dumps(full_name)}: {json.dumps(summary)}")
+        empty = False
+    f.write("}" if empty else "\n}")
+
+def iter_tree_lines(node, indent="  "):
+    """
+    Iteratively yield the lines of an indented listing of the tree: every folder
+    (with a trailing '/') followed by its files, then its subfolders.
+    """
+    stack = [(node, 0)]
+    while stack:
+        current, depth = stack.pop()
+        yield f"{indent * depth}{current.name}/"
+        for file_name in current.files:
+            yield f"{indent * (depth + 1)}{file_name}"
+        for child in reversed(current.subfolders):
+            stack.append((child, depth + 1))
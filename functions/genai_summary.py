@@ -1,23 +1,98 @@
-import os
-from mistralai import Mistral
-from dotenv import load_dotenv
-
-load_dotenv()
-api_key = os.environ["MISTRAL_API_KEY"]
-model = "mistral-large-latest"
-
-client = Mistral(api_key=api_key)
-
-def generate_summary(text):
-    chat_response = client.chat.complete(
-        model = model,
-        messages = [
-            {
-                "role": "user",
-                "content": f"""Summarize the following text from a code github repo:
+import time
+
+from .summary_cache import summary_cache
+from .scheduler import api_slot
+from .rate_limit import request_bucket, plan_retry, REQUEST_TIMEOUT
+from .dedup import prompt_memo, dedup_stats
+from .tokens import estimate_tokens
+from .profiling import profiler
+from .backends import get_backend
+from .events import summary_events
+from . import routing
+
+
+def current_model():
+    """
+    Name of the model answering prompts, or a description of the routing policy when calls
+    are routed between models (recorded with runs and part of file cache keys).
+    """
+    policy = routing.get_policy()
+    return policy.signature() if policy is not None else get_backend().model
+
+def route_model(call_type, prompt):
+    """Return the model answering a prompt of the given call type (see routing.CALL_TYPES)."""
+    policy = routing.get_policy()
+    if policy is None:
+        return get_backend().model
+    return policy.choose(call_type, estimate_tokens(prompt))
+
+def build_prompt(text):
+    return f"""Summarize the following text from a code github repo:
                 <text> {text} </text>
-                Output the summary and only the summary.""",
-            },
-        ],
-    )
-    return chat_response.choices[0].message.content
\ No newline at end of file
+                Output the summary and only the summary."""
+
+def build_messages(prompt):
+    return [
+        {
+            "role": "user",
+            "content": prompt,
+        },
+    ]
+
+def generate_summary(text, call_type="folder"):
+    """
+    Summarize 'text'. 'call_type' (file, chunk, folder, reduce or root) lets the routing
+    policy pick the model; it is ignored while routing is off.
+    """
+    prompt = build_prompt(text)
+    model = route_model(call_type, prompt)
+    # Identical prompts for the same model always map to the same cache entry,
+    # so unchanged files and folders are answered without an API call.
+    cache_key = summary_cache.make_key(model, prompt)
+    # Identical prompts issued in the same process (duplicated files or folders, possibly
+    # at the same time from different workers) are only sent once.
+    (summary, from_api), computed = prompt_memo.get_or_compute(
+        cache_key, lambda: request_summary(prompt, cache_key, model, call_type))
+    if not computed and from_api:
+        dedup_stats.add(calls=1, tokens=estimate_tokens(prompt))
+    return summary
+
+def request_summary(prompt, cache_key, model=None, call_type=None):
+    """Answer a prompt from the summary cache or the backend. Returns (summary, from_api)."""
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        profiler.count("cache_hits")
+        return cached, False
+    profiler.count("cache_misses")
+    backend = get_backend(model)
+    limiter = routing.model_limiter
+    call_id = cache_key[:12]
+    attempt = 0
+    while True:
+        request_bucket.acquire()
+        limiter.acquire_rate(backend.model)
+        try:
+            # The model's own slot is taken first, so waiting for it never holds a shared slot.
+            with limiter.slot(backend.model), api_slot(), \
+                    profiler.span("api_call", prompt_chars=len(prompt), attempt=attempt,
+                                  model=backend.model, call_type=call_type) as span:
+                if summary_events.wants_tokens():
+                    # Someone is watching: stream the answer, publishing it piece by piece.
+                    publish = lambda text: summary_events.publish({"type": "token", "call": call_id, "text": text})
+                    completion = backend.stream(build_messages(prompt), publish, timeout=REQUEST_TIMEOUT)
+                else:
+                    completion = backend.complete(build_messages(prompt), timeout=REQUEST_TIMEOUT)
+                span.set(prompt_tokens=completion.prompt_tokens, completion_tokens=completion.completion_tokens)
+            break
+        except Exception as e:
+            delay = plan_retry(e, attempt)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+    profiler.count("api_calls")
+    profiler.count(f"api_calls:{backend.model}")
+    profiler.record_usage(completion, model=backend.model)
+    summary = completion.text
+    summary_cache.put(cache_key, summary)
+    return summary, True
@@ -0,0 +1,172 @@
+import os
+import json
+import hashlib
+import subprocess
+
+from .folder_tree import node_key
+from .folder_summarization import folder_summary_text
+from .ingest import file_digest
+
+# -----------------------------
+# Incremental Re-Summarization State
+# -----------------------------
+# Alongside summary_tree_<repo>.json, each run saves summary_state_<repo>.json with the
+# summarized commit and, per folder, a content fingerprint and the generated summary.
+# The next incremental run only re-summarizes folders whose fingerprint changed.
+STATE_VERSION = 1
+
+
+def state_file_path(output_dir, repo_name):
+    return os.path.join(output_dir, f"summary_state_{repo_name}.json")
+
+
+def load_state(state_file):
+    """Load a previously saved summary state, or return None if missing or unreadable."""
+    if not os.path.exists(state_file):
+        return None
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def save_state(state_file, tree, fingerprints, commit, model_name):
+    """Save the commit, model and per-folder fingerprints and summaries of a finished run."""
+    nodes = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        key = node_key(node, tree)
+        nodes[key] = {
+            "fingerprint": fingerprints.get(key),
+            "summary": folder_summary_text(node),
+        }
+        stack.extend(node.subfolders)
+    state = {
+        "version": STATE_VERSION,
+        "commit": commit,
+        "model": model_name,
+        "nodes": nodes,
+    }
+    tmp_file = state_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_file, state_file)
+
+
+# -----------------------------
+# Git Helpers
+# -----------------------------
+def _git_lines(repo_root, *args):
+    result = subprocess.run(["git", *args], cwd=repo_root, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def get_head_commit(repo_root):
+    """Return the commit checked out in repo_root, or None if it is not a git checkout."""
+    try:
+        return _git_lines(repo_root, "rev-parse", "HEAD")[0]
+    except (subprocess.CalledProcessError, OSError, IndexError):
+        return None
+
+
+def changed_files_since(repo_root, commit):
+    """
+    Return the set of paths (relative to repo_root, POSIX style) that differ between
+    'commit' and the current working tree: committed changes since 'commit', uncommitted
+    changes and untracked files. Returns None if git cannot tell (no checkout, unknown commit).
+    """
+    if not commit:
+        return None
+    try:
+        changed = set(_git_lines(repo_root, "diff", "--name-only", "--no-renames", "--relative", commit))
+        changed.update(_git_lines(repo_root, "ls-files", "--others", "--exclude-standard"))
+    except (subprocess.CalledProcessError, OSError):
+        return None
+    return changed
+
+
+def dirty_folders(changed_files):
+    """Return the keys of every folder containing a changed file, plus all their ancestors."""
+    dirty = {"."}
+    for path in changed_files:
+        folder = os.path.dirname(path.rstrip("/"))
+        while folder:
+            if folder in dirty:
+                break
+            dirty.add(folder)
+            folder = os.path.dirname(folder)
+    return dirty
+
+
+# -----------------------------
+# Content Fingerprints
+# -----------------------------
+def _file_digest(file_path):
+    try:
+        return file_digest(file_path)
+    except OSError as e:
+        return f"<unreadable: {e}>"
+
+
+def compute_fingerprints(tree, known=None, dirty=None):
+    """
+    Compute a Merkle-style fingerprint for every folder of the tree: a hash of its file
+    names and contents and of its subfolders' fingerprints.
+
+    Folders that are not in 'dirty' take their fingerprint from 'known' (the previous run)
+    without reading any file. With dirty=None every folder is hashed.
+    Returns a dict mapping folder keys to fingerprints.
+    """
+    known = known or {}
+    order = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(node.subfolders)
+    fingerprints = {}
+    # Children always appear after their parent in 'order', so walk it backwards.
+    for node in reversed(order):
+        key = node_key(node, tree)
+        if dirty is not None and key not in dirty and key in known:
+            fingerprints[key] = known[key]
+            continue
+        digest = hashlib.sha256()
+        for file_name in sorted(node.files):
+            digest.update(f"file:{file_name}:{_file_digest(os.path.join(node.path, file_name))}\n".encode("utf-8"))
+        for child in sorted(node.subfolders, key=lambda child: child.name):
+            digest.update(f"dir:{child.name}:{fingerprints[node_key(child, tree)]}\n".encode("utf-8"))
+        fingerprints[key] = digest.hexdigest()
+    return fingerprints
+
+
+def plan_incremental_run(tree, previous_state, model_name):
+    """
+    Decide which folders can keep their previous summary.
+
+    Uses git (changes since the previously summarized commit) to limit hashing to folders
+    containing changed files and their ancestors, and falls back to hashing the whole tree
+    when git cannot tell. Returns (reuse, fingerprints): 'reuse' maps folder keys to the
+    previous summaries of unchanged folders, ready to pass to summarize_folder.
+    """
+    if not previous_state or previous_state.get("model") != model_name:
+        return {}, compute_fingerprints(tree)
+    previous_nodes = previous_state.get("nodes", {})
+    changed = changed_files_since(tree.path, previous_state.get("commit"))
+    if changed is None:
+        fingerprints = compute_fingerprints(tree)
+    else:
+        known = {key: entry["fingerprint"] for key, entry in previous_nodes.items() if entry.get("fingerprint")}
+        fingerprints = compute_fingerprints(tree, known=known, dirty=dirty_folders(changed))
+    reuse = {}
+    for key, fingerprint in fingerprints.items():
+        previous = previous_nodes.get(key)
+        if previous and previous.get("fingerprint") == fingerprint and previous.get("summary") is not None:
+            reuse[key] = previous["summary"]
+    return reuse, fingerprints
@@ -0,0 +1,177 @@
+import io
+import os
+import mmap
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .tokens import estimate_tokens
+from .sources import open_binary, get_size, get_digest
+from .notebooks import stream_notebook_source, notebook_sources
+
+# -----------------------------
+# Ingestion Settings
+# -----------------------------
+# Files larger than this are never read into a prompt; only their name is included.
+MAX_FILE_BYTES = int(os.environ.get("SUMMARY_MAX_FILE_BYTES", 1024 * 1024))
+# Notebooks carry outputs and embedded images, so their raw size is allowed to be larger.
+MAX_NOTEBOOK_BYTES = int(os.environ.get("SUMMARY_MAX_NOTEBOOK_BYTES", 50 * 1024 * 1024))
+# Number of leading bytes inspected to decide whether a file is binary.
+SNIFF_BYTES = 8192
+# Files are decoded in blocks of this many characters, bounding the memory used to count them.
+READ_BLOCK_CHARS = 1024 * 1024
+# Files at least this large are hashed through mmap instead of buffered reads.
+MMAP_MIN_BYTES = 4 * 1024 * 1024
+# Number of file digests remembered (by path, size and modification time) for the current process.
+DIGEST_CACHE_ENTRIES = 200000
+
+
+def looks_binary(sample):
+    """
+    Return True if the leading bytes of a file look like binary data: they contain a NUL
+    byte, or are not UTF-8 and contain many control characters.
+    """
+    if not sample:
+        return False
+    if b"\0" in sample:
+        return True
+    try:
+        sample.decode("utf-8")
+        return False
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is still valid UTF-8.
+        if e.start >= len(sample) - 3 and e.reason == "unexpected end of data":
+            return False
+    control = sum(1 for byte in sample if byte < 32 and byte not in (9, 10, 12, 13))
+    return control / len(sample) > 0.1
+
+
+class DigestCache:
+    """
+    File digests by (path, size, modification time), so that the fingerprinting, dedup and
+    caching steps of a run hash each file once. A file changed on disk gets a new key.
+    """
+
+    def __init__(self, max_entries=DIGEST_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, digest):
+        with self._lock:
+            self._entries[key] = digest
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+file_digests = DigestCache()
+
+
+def file_digest(file_path):
+    """Return the SHA-256 hex digest of a file's bytes, using mmap for large files on disk."""
+    # Mounted sources (archives) know the digests of their members.
+    known = get_digest(file_path)
+    if known is not None:
+        return known
+    with open(file_path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        known = file_digests.get(key)
+        if known is not None:
+            return known
+        digest = hashlib.sha256()
+        if stat.st_size >= MMAP_MIN_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    file_digests.put(key, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def read_notebook_source(file_path):
+    """
+    Return the cell sources of a notebook, parsed in a streaming pass (outputs and
+    attachments are skipped, oversized cells truncated) and cached by file hash.
+    """
+    digest = file_digest(file_path)
+    text = notebook_sources.get(digest)
+    if text is not None:
+        return text
+    try:
+        with io.TextIOWrapper(open_binary(file_path), encoding='utf-8', errors='replace') as f:
+            text = stream_notebook_source(f)
+    except ValueError as e:
+        return f"<Error processing ipynb file: {e}>"
+    notebook_sources.put(digest, text)
+    return text
+
+
+def ingest_file(file_path, retain=True):
+    """
+    Read a file for summarization in a single streaming pass.
+
+    Files over the byte cap and binary files (sniffed from their first SNIFF_BYTES) are
+    replaced by a placeholder without being read. Other files are decoded in bounded blocks
+    while their tokens are counted; with retain=False only the count is kept, so arbitrarily
+    many files can be measured in bounded memory.
+
+    Returns a tuple (text, tokens, is_placeholder); text is None when retain=False
+    and the file was actually read.
+    """
+    file_name = os.path.basename(file_path)
+    _, ext = os.path.splitext(file_name)
+    try:
+        size = get_size(file_path)
+    except OSError as e:
+        text = f"<Error reading file: {e}>"
+        return text, estimate_tokens(text), True
+    # Checked before opening: archive members over the cap are not kept, so cannot be opened.
+    max_bytes = MAX_NOTEBOOK_BYTES if ext.lower() == '.ipynb' else MAX_FILE_BYTES
+    if size > max_bytes:
+        text = (f"<File '{file_name}' is too large ({size} bytes) and is excluded from processing; "
+                "only file name is included>")
+        return text, estimate_tokens(text), True
+    try:
+        with open_binary(file_path) as f:
+            sample = f.read(SNIFF_BYTES)
+    except OSError as e:
+        text = f"<Error reading file: {e}>"
+        return text, estimate_tokens(text), True
+    if looks_binary(sample):
+        text = f"<File '{file_name}' looks binary and is excluded from processing; only file name is included>"
+        return text, estimate_tokens(text), True
+
+    if ext.lower() == '.ipynb':
+        try:
+            text = read_notebook_source(file_path)
+        except OSError as e:
+            text = f"<Error reading file: {e}>"
+            return text, estimate_tokens(text), True
+        return (text if retain else None), estimate_tokens(text), False
+
+    blocks = []
+    tokens = 0
+    try:
+        with io.TextIOWrapper(open_binary(file_path), encoding='utf-8', errors='replace') as f:
+            for block in iter(lambda: f.read(READ_BLOCK_CHARS), ""):
+                if retain:
+                    blocks.append(block)
+                else:
+                    tokens += estimate_tokens(block)
+    except OSError as e:
+        text = f"<Error reading file: {e}>"
+        return text, estimate_tokens(text), True
+    if not retain:
+        return None, tokens, False
+    text = "".join(blocks)
+    return text, estimate_tokens(text), False
@@ -0,0 +1,181 @@
+import os
+import uuid
+import time
+import queue
+import threading
+
+from .clone_manager import clone_manager
+
+# -----------------------------
+# Job Queue Settings
+# -----------------------------
+# Number of repositories summarized at the same time by the app's background workers.
+JOB_WORKERS = int(os.environ.get("SUMMARY_JOB_WORKERS", 2))
+# Finished jobs kept for status polling (and for de-duplicating repeated requests).
+MAX_FINISHED_JOBS = int(os.environ.get("SUMMARY_JOB_HISTORY", 100))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once its cancellation has been requested."""
+
+
+class Job:
+    """
+    One summarization request: a repository URL resolved to a commit, its status
+    (queued, running, done, failed or cancelled), progress in folders and result.
+    """
+
+    def __init__(self, repo_url, commit):
+        self.id = uuid.uuid4().hex[:8]
+        self.repo_url = repo_url
+        self.commit = commit
+        self.status = QUEUED
+        self.message = "Waiting for a worker"
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        # Results published while the job runs (e.g. folder summaries by key, leaves first).
+        self.partial = {}
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._progress_lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested; called by the job between steps."""
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def set_progress(self, message=None, done=None, total=None):
+        if message is not None:
+            self.message = message
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+
+    def advance(self, message=None):
+        """Count one more unit of work done (safe to call from several threads)."""
+        with self._progress_lock:
+            self.done += 1
+            if message is not None:
+                self.message = message
+
+    def snapshot(self):
+        """Return the job's state as a plain dict (for display or JSON)."""
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "repo_url": self.repo_url,
+            "commit": self.commit[:12],
+            "status": self.status,
+            "progress": f"{self.done}/{self.total}" if self.total else "",
+            "message": self.error or self.message,
+            "seconds": round(end - self.started_at, 1) if self.started_at else 0.0,
+        }
+
+
+class JobQueue:
+    """
+    Local queue of summarization jobs run by a pool of daemon worker threads.
+
+    submit() resolves the repository's HEAD to a commit first: a request for a repository
+    and commit that is already queued, running or done returns that job instead of starting
+    a new one. run_job(job) does the work, reporting progress with job.set_progress / job.advance and
+    calling job.check_cancelled() regularly; its return value becomes job.result.
+    """
+
+    def __init__(self, run_job, workers=JOB_WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self.run_job = run_job
+        self.max_finished = max_finished
+        self._jobs = {}
+        self._by_commit = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, repo_url, rev="HEAD"):
+        """Queue the summarization of 'rev' of repo_url and return its Job (possibly an existing one)."""
+        commit = clone_manager.resolve_rev(repo_url, rev)
+        with self._lock:
+            existing = self._by_commit.get((repo_url, commit))
+            if existing is not None and existing.status not in (FAILED, CANCELLED):
+                return existing
+            job = Job(repo_url, commit)
+            self._jobs[job.id] = job
+            self._by_commit[(repo_url, commit)] = job
+            self._forget_old_jobs()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self):
+        """Return every known job, most recently submitted first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: -job.submitted_at)
+
+    def cancel(self, job_id):
+        """
+        Request the cancellation of a job. A queued job is dropped at once; a running one stops
+        at its next check. Returns False if the job is unknown or already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return False
+            job._cancel.set()
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED, message="Cancelled before start")
+        return True
+
+    def _finish(self, job, status, message=None, result=None, error=None):
+        job.status = status
+        job.finished_at = time.time()
+        job.result = result
+        job.error = error
+        if message is not None:
+            job.message = message
+
+    def _forget_old_jobs(self):
+        finished = sorted((job for job in self._jobs.values() if job.status in FINISHED),
+                          key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+            if self._by_commit.get((job.repo_url, job.commit)) is job:
+                del self._by_commit[(job.repo_url, job.commit)]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.status != QUEUED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.message = "Starting"
+            try:
+                result = self.run_job(job)
+            except JobCancelled:
+                with self._lock:
+                    self._finish(job, CANCELLED, message="Cancelled")
+            except Exception as e:
+                with self._lock:
+                    self._finish(job, FAILED, error=f"{type(e).__name__}: {e}")
+            else:
+                with self._lock:
+                    self._finish(job, DONE, message="Done", result=result)
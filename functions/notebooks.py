@@ -0,0 +1,253 @@
+import os
+import re
+from json.decoder import scanstring
+import threading
+from collections import OrderedDict
+
+from .summary_cache import source_cache
+
+# -----------------------------
+# Notebook Settings
+# -----------------------------
+# Cell sources longer than this many characters are truncated in the extracted text.
+MAX_CELL_CHARS = int(os.environ.get("SUMMARY_NOTEBOOK_MAX_CELL_CHARS", 20000))
+# Number of extracted notebook sources kept in memory (by file hash) for the current process.
+MEMORY_CACHE_ENTRIES = 256
+# Notebooks are parsed from blocks of this many characters.
+READ_BLOCK_CHARS = 1024 * 1024
+
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_WHITESPACE = re.compile(r'\s*')
+_SCALAR = re.compile(r'[^,}\]\s]*')
+
+
+class _JsonScanner:
+    """
+    Minimal incremental JSON reader over a text stream. Only the values asked for are
+    decoded; everything else is skipped by jumping between quotes and brackets, so large
+    values (outputs, embedded images) are never materialized.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+
+    def fill(self):
+        """Append the next block of the stream to the buffer. Returns False at the end."""
+        block = self.f.read(READ_BLOCK_CHARS)
+        if not block:
+            return False
+        self.buf = self.buf[self.pos:] + block
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("unexpected end of notebook")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected '{char}' at offset {self.pos}, found '{self.buf[self.pos]}'")
+        self.pos += 1
+
+    def read_string(self, keep=None):
+        """
+        Read a JSON string. Returns (text, skipped): at most 'keep' characters (all if None)
+        are decoded, and 'skipped' counts the raw characters dropped beyond them.
+        """
+        self.expect('"')
+        kept = []
+        kept_chars = 0
+        skipped = 0
+
+        def take(end):
+            nonlocal kept_chars, skipped
+            length = end - self.pos
+            room = length if keep is None else max(0, min(length, keep - kept_chars))
+            if room:
+                kept.append(self.buf[self.pos:self.pos + room])
+                kept_chars += room
+            skipped += length - room
+            self.pos = end
+
+        # Quotes are found with str.find, so long values (base64 images) are crossed at
+        # memchr speed; a quote preceded by an odd number of backslashes is escaped.
+        scan = self.pos
+        while True:
+            quote = self.buf.find('"', scan)
+            if quote == -1:
+                # Keep trailing backslashes in the buffer: their escape continues in the next block.
+                end = len(self.buf)
+                while end > self.pos and self.buf[end - 1] == "\\":
+                    end -= 1
+                take(end)
+                if not self.fill():
+                    raise ValueError("unterminated string in notebook")
+                scan = self.pos
+                continue
+            backslashes = 0
+            while quote - 1 - backslashes >= self.pos and self.buf[quote - 1 - backslashes] == "\\":
+                backslashes += 1
+            if backslashes % 2:
+                scan = quote + 1
+                continue
+            take(quote)
+            self.pos = quote + 1
+            break
+        raw = "".join(kept)
+        if "\\" not in raw:
+            return raw, skipped
+        # A truncated string may end inside an escape sequence: drop it.
+        for cut in range(len(raw), max(-1, len(raw) - 7), -1):
+            try:
+                return scanstring(raw[:cut] + '"', 0)[0], skipped
+            except ValueError:
+                continue
+        raise ValueError("invalid string escape in notebook")
+
+    def skip_value(self):
+        """Skip the next value (of any size) without decoding it."""
+        char = self.peek()
+        if char == '"':
+            self.read_string(keep=0)
+            return
+        if char not in "{[":
+            while True:
+                self.pos = _SCALAR.match(self.buf, self.pos).end()
+                if self.pos < len(self.buf) or not self.fill():
+                    return
+        depth = 0
+        while True:
+            match = _STRUCTURE.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise ValueError("unexpected end of notebook")
+                continue
+            self.pos = match.start()
+            char = self.buf[self.pos]
+            if char == '"':
+                self.read_string(keep=0)
+                continue
+            self.pos += 1
+            depth += 1 if char in "{[" else -1
+            if depth == 0:
+                return
+
+    def iter_items(self, opening, closing):
+        """Iterate over an object (yielding its keys) or array (yielding None) being read."""
+        self.expect(opening)
+        if self.peek() == closing:
+            self.pos += 1
+            return
+        while True:
+            if opening == "{":
+                key, _ = self.read_string()
+                self.expect(":")
+                yield key
+            else:
+                yield None
+            char = self.peek()
+            self.pos += 1
+            if char == closing:
+                return
+            if char != ",":
+                raise ValueError(f"expected ',' or '{closing}' in notebook, found '{char}'")
+
+
+def _read_cell(scanner, max_cell_chars):
+    """Read one cell object. Returns (cell_type, source, omitted_characters)."""
+    cell_type, parts, length, omitted = None, [], 0, 0
+    for key in scanner.iter_items("{", "}"):
+        if key == "cell_type":
+            cell_type, _ = scanner.read_string()
+        elif key == "source":
+            lines = scanner.iter_items("[", "]") if scanner.peek() == "[" else [None]
+            for _ in lines:
+                text, skipped = scanner.read_string(keep=max(0, max_cell_chars - length))
+                parts.append(text)
+                length += len(text)
+                omitted += skipped
+        else:
+            # outputs, attachments, metadata, execution_count, id...
+            scanner.skip_value()
+    return cell_type, "".join(parts), omitted
+
+
+def stream_notebook_source(f, max_cell_chars=None):
+    """
+    Return the code and markdown cell sources of the Jupyter Notebook read from text stream
+    'f', parsing its JSON incrementally: outputs, attachments and metadata are skipped
+    without being decoded, and cell sources beyond max_cell_chars are truncated.
+    """
+    max_cell_chars = max_cell_chars or MAX_CELL_CHARS
+    scanner = _JsonScanner(f)
+    filtered_cells = []
+    for key in scanner.iter_items("{", "}"):
+        if key != "cells":
+            scanner.skip_value()
+            continue
+        for _ in scanner.iter_items("[", "]"):
+            cell_type, source, omitted = _read_cell(scanner, max_cell_chars)
+            if omitted:
+                source += f"\n<... cell truncated, about {omitted} more characters omitted>"
+            if cell_type == 'code':
+                filtered_cells.append(f"```python\n{source}\n```\n")
+            elif cell_type == 'markdown':
+                filtered_cells.append(source + "\n")
+    # Lone surrogates (e.g. an escape pair cut by truncation) cannot be encoded later on.
+    return "\n".join(filtered_cells).encode("utf-8", errors="replace").decode("utf-8")
+
+
+class NotebookSourceCache:
+    """
+    Extracted notebook sources by file hash: a small in-memory LRU in front of a persistent
+    store (a summary_cache.SummaryCache), so that a notebook is parsed once per content.
+    """
+
+    def __init__(self, store=None, max_entries=MEMORY_CACHE_ENTRIES):
+        self.store = store
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, digest):
+        return f"notebook_source_{MAX_CELL_CHARS}_{digest}"
+
+    def get(self, digest):
+        key = self._key(digest)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        text = self.store.get(key) if self.store is not None else None
+        if text is not None:
+            self._remember(key, text)
+        return text
+
+    def put(self, digest, text):
+        key = self._key(digest)
+        self._remember(key, text)
+        if self.store is not None:
+            self.store.put(key, text)
+
+    def _remember(self, key, text):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared cache of extracted notebook sources, persisted in the summary cache's 'sources' directory.
+notebook_sources = NotebookSourceCache(source_cache)
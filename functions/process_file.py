@@ -1,24 +1,87 @@
 import os
-import json
-from .genai_summary import generate_summary
+import ast
+from .genai_summary import generate_summary, current_model
+from .summary_cache import summary_cache
+from .scheduler import run_parallel
+from .tokens import estimate_tokens, PROMPT_TOKEN_BUDGET, CHARS_PER_TOKEN
+from .files_exclusion import LANGUAGE_TAGS
+from .ingest import ingest_file, file_digest
+from .dedup import file_memo, file_memo_key, dedup_stats
 
 EXCLUDED_EXTENSIONS = {'.yaml', '.yml', '.xlsx', '.docx', '.pptx', '.json', '.csv', '.png', '.jpeg', '.txt'}
 
-def split_text_into_chunks(words, chunk_size=3000, context=1000):
+def _python_boundaries(text):
     """
-    Split a list of words into chunks of size 'chunk_size'.
-    Each chunk will be extended by a context window of 'context' words before and after (if available).
-    Returns a list of word lists (chunks).
+    Return the (0-based) line numbers where top-level statements and class members start,
+    including their decorators, or None if the text is not valid Python.
     """
+    try:
+        module = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    boundaries = set()
+    statements = list(module.body)
+    for statement in module.body:
+        if isinstance(statement, ast.ClassDef):
+            statements.extend(statement.body)
+    for statement in statements:
+        decorators = getattr(statement, 'decorator_list', [])
+        first_line = min([statement.lineno] + [d.lineno for d in decorators])
+        boundaries.add(first_line - 1)
+    return sorted(boundaries)
+
+def split_text_into_chunks(text, max_tokens=None, language=None):
+    """
+    Split 'text' into chunks whose estimated size stays within 'max_tokens', cutting only
+    at line boundaries so that code formatting is preserved. For Python source, chunks are
+    preferably cut between top-level definitions and class members (AST boundaries).
+    Lines longer than the whole budget are the only thing ever cut mid-line.
+    Returns a list of (first_line, chunk_text) tuples, with 1-based line numbers.
+    """
+    max_tokens = max_tokens or PROMPT_TOKEN_BUDGET
+    lines = text.splitlines(keepends=True)
+    boundaries = _python_boundaries(text) if language == 'python' else None
+    if boundaries:
+        cuts = sorted(set([0] + boundaries + [len(lines)]))
+        segments = [(cuts[i], lines[cuts[i]:cuts[i + 1]]) for i in range(len(cuts) - 1)]
+    else:
+        segments = [(i, [line]) for i, line in enumerate(lines)]
+
     chunks = []
-    n = len(words)
-    start = 0
-    while start < n:
-        end = min(start + chunk_size, n)
-        context_start = max(0, start - context)
-        context_end = min(n, end + context)
-        chunks.append(words[context_start:context_end])
-        start += chunk_size
+    current = []
+    current_start = 0
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append((current_start + 1, "".join(current)))
+        current = []
+        current_tokens = 0
+
+    for segment_start, segment_lines in segments:
+        segment_tokens = estimate_tokens("".join(segment_lines))
+        if segment_tokens > max_tokens and len(segment_lines) > 1:
+            # A single definition larger than the budget: fall back to line boundaries.
+            pieces = [(segment_start + i, [line]) for i, line in enumerate(segment_lines)]
+        else:
+            pieces = [(segment_start, segment_lines)]
+        for piece_start, piece_lines in pieces:
+            piece_text = "".join(piece_lines)
+            piece_tokens = segment_tokens if len(pieces) == 1 else estimate_tokens(piece_text)
+            if current and current_tokens + piece_tokens > max_tokens:
+                flush()
+            if not current:
+                current_start = piece_start
+            if piece_tokens > max_tokens:
+                # A single enormous line (e.g. minified code): cut it by characters.
+                step = max(1, int(max_tokens * CHARS_PER_TOKEN))
+                for offset in range(0, len(piece_text), step):
+                    chunks.append((piece_start + 1, piece_text[offset:offset + step]))
+                continue
+            current.append(piece_text)
+            current_tokens += piece_tokens
+    flush()
     return chunks
 
 # -----------------------------
@@ -28,38 +91,17 @@ def read_file_content(file_path):
     """
     Read the file content. If the file is a Jupyter Notebook (.ipynb),
     extract and return only the cell sources for code and markdown cells.
-    Otherwise, return the raw content.
+    Binary files and files over the size cap are replaced by a placeholder
+    (see ingest_file). Otherwise, return the raw content.
     """
-    _, ext = os.path.splitext(file_path)
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
-    except Exception as e:
-        return f"<Error reading file: {e}>"
-    
-    if ext.lower() == '.ipynb':
-        try:
-            nb = json.loads(content)
-            cells = nb.get('cells', [])
-            filtered_cells = []
-            for cell in cells:
-                cell_type = cell.get('cell_type', '')
-                if cell_type in ('code', 'markdown'):
-                    cell_source = ''.join(cell.get('source', []))
-                    if cell_type == 'code':
-                        filtered_cells.append(f"```python\n{cell_source}\n```\n")
-                    elif cell_type == 'markdown':
-                        filtered_cells.append(cell_source + "\n")
-            content = "\n".join(filtered_cells)
-        except Exception as e:
-            content = f"<Error processing ipynb file: {e}>"
+    content, _, _ = ingest_file(file_path)
     return content
 
 def process_file(file_path):
     """
     Read the file at 'file_path' and return a summary.
-    If the file has more than 20k words, split it into overlapping chunks,
-    summarize each, and aggregate the chunk summaries.
+    If the file does not fit in the prompt token budget, split it on line (or, for Python,
+    AST) boundaries into chunks that do, summarize each, and aggregate the chunk summaries.
     If the file's extension is in EXCLUDED_EXTENSIONS, return a placeholder summary.
     """
     _, ext = os.path.splitext(file_path)
@@ -67,15 +109,33 @@ def process_file(file_path):
         return (f"<File '{os.path.basename(file_path)}' with extension '{ext}' "
                 "is excluded from content summarization; only file name is included.>")
     
-    content = read_file_content(file_path)
-    words = content.split()
-    if len(words) > 20000:
-        chunks = split_text_into_chunks(words, chunk_size=4000, context=100)
-        chunk_summaries = []
-        for i, chunk in enumerate(chunks):
-            chunk_text = " ".join(chunk)
-            summary = generate_summary(chunk_text)
-            chunk_summaries.append(f"Chunk {i+1} summary: {summary}")
-        return "\n".join(chunk_summaries)
+    try:
+        digest = file_digest(file_path)
+    except OSError:
+        return summarize_file_content(file_path, ext)
+    # Identical files (e.g. vendored copies) are only summarized once per process.
+    summary, computed = file_memo.get_or_compute(file_memo_key(digest),
+                                                 lambda: summarize_file_content(file_path, ext))
+    if not computed:
+        dedup_stats.add(calls=1)
+    return summary
+
+def summarize_file_content(file_path, ext):
+    """Summarize a file's content, chunking it if it does not fit in one prompt."""
+    content, tokens, _ = ingest_file(file_path)
+    # Check the cache on the file content itself, so that an unchanged oversized file
+    # is not even split into chunks again.
+    cache_key = summary_cache.make_key("process_file", current_model(), content)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    if tokens > PROMPT_TOKEN_BUDGET:
+        chunks = split_text_into_chunks(content, PROMPT_TOKEN_BUDGET, LANGUAGE_TAGS.get(ext.lower()))
+        summaries = run_parallel(lambda chunk: generate_summary(chunk[1], call_type="chunk"), chunks)
+        chunk_summaries = [f"Chunk {i+1} (from line {first_line}) summary: {summary}"
+                           for i, ((first_line, _), summary) in enumerate(zip(chunks, summaries))]
+        result = "\n".join(chunk_summaries)
     else:
-        return generate_summary(content)
\ No newline at end of file
+        result = generate_summary(content, call_type="file")
+    summary_cache.put(cache_key, result)
+    return result
\ No newline at end of file
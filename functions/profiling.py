@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import threading
+
+# -----------------------------
+# Profiling Settings
+# -----------------------------
+# Prices in USD per million tokens used to estimate the API cost of a run, for models
+# without a price of their own (defaults: mistral-large list prices).
+PRICE_PER_M_PROMPT_TOKENS = float(os.environ.get("SUMMARY_PRICE_PER_M_PROMPT_TOKENS", 2.0))
+PRICE_PER_M_COMPLETION_TOKENS = float(os.environ.get("SUMMARY_PRICE_PER_M_COMPLETION_TOKENS", 6.0))
+# Per-model prices, as 'model=prompt_price:completion_price,...' (USD per million tokens),
+# added to (or overriding) the list prices below.
+MODEL_PRICES = os.environ.get("SUMMARY_MODEL_PRICES", "")
+DEFAULT_MODEL_PRICES = {
+    "mistral-large-latest": (2.0, 6.0),
+    "mistral-small-latest": (0.2, 0.6),
+}
+
+
+def parse_model_prices(spec):
+    """Parse 'model=prompt_price:completion_price,...' into {model: (prompt_price, completion_price)}."""
+    prices = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        model, _, values = entry.strip().partition("=")
+        prompt_price, _, completion_price = values.partition(":")
+        prices[model.strip()] = (float(prompt_price), float(completion_price or prompt_price))
+    return prices
+
+
+def model_price(model):
+    """Return (prompt, completion) USD prices per million tokens of 'model'."""
+    prices = {**DEFAULT_MODEL_PRICES, **parse_model_prices(MODEL_PRICES)}
+    return prices.get(model, (PRICE_PER_M_PROMPT_TOKENS, PRICE_PER_M_COMPLETION_TOKENS))
+
+
+class _Span:
+    """Times one stage; used through Profiler.span."""
+    __slots__ = ('profiler', 'stage', 'attrs', 'start')
+
+    def __init__(self, profiler, stage, attrs):
+        self.profiler = profiler
+        self.stage = stage
+        self.attrs = attrs
+        self.start = None
+
+    def set(self, **attrs):
+        """Attach more attributes to the span (e.g. results known only at the end)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.profiler._finish(self.stage, self.start, duration, self.attrs)
+
+
+class _NoSpan:
+    """Stand-in returned by Profiler.span while profiling is off."""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Profiler:
+    """
+    Collects timing spans and counters for a run.
+
+    Each span (a stage such as 'clone', 'build_tree', 'folder', 'read_file' or 'api_call',
+    with attributes like the folder key) is appended to a JSON-lines trace as soon as it ends
+    and aggregated per stage. Counters track API calls, retries, cache hits and the prompt
+    and completion tokens reported by the API. While disabled, spans and counters cost
+    next to nothing.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_path = None
+        self._trace = None
+        self._origin = time.perf_counter()
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def start(self, trace_path=None):
+        """Enable profiling, writing the JSON-lines trace to trace_path if given."""
+        with self._lock:
+            self.enabled = True
+            self._origin = time.perf_counter()
+            self._stages = {}
+            self._counters = {}
+            if trace_path:
+                os.makedirs(os.path.dirname(trace_path) or ".", exist_ok=True)
+                self.trace_path = trace_path
+                self._trace = open(trace_path, "w", encoding="utf-8")
+
+    def stop(self):
+        """Disable profiling and close the trace."""
+        with self._lock:
+            self.enabled = False
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+
+    def span(self, stage, **attrs):
+        """Return a context manager timing 'stage', e.g. `with profiler.span('clone', url=url):`."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, stage, attrs)
+
+    def _finish(self, stage, start, duration, attrs):
+        with self._lock:
+            count, total, longest = self._stages.get(stage, (0, 0.0, 0.0))
+            self._stages[stage] = (count + 1, total + duration, max(longest, duration))
+            if self._trace is not None:
+                event = {"stage": stage, "start": round(start - self._origin, 6),
+                         "duration": round(duration, 6), "thread": threading.current_thread().name}
+                event.update(attrs)
+                self._trace.write(json.dumps(event, default=str) + "\n")
+
+    def count(self, name, amount=1):
+        """Add 'amount' to the counter 'name'."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def record_usage(self, usage, model=None):
+        """
+        Count the prompt and completion tokens of an API response's 'usage' field, also per
+        model when 'model' is given (so that each model is priced separately).
+        """
+        if not self.enabled or usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self.count("prompt_tokens", prompt_tokens)
+        self.count("completion_tokens", completion_tokens)
+        if model is not None:
+            self.count(f"prompt_tokens:{model}", prompt_tokens)
+            self.count(f"completion_tokens:{model}", completion_tokens)
+
+    def report(self):
+        """Return the end-of-run summary table."""
+        with self._lock:
+            stages = dict(self._stages)
+            counters = dict(self._counters)
+        wall = time.perf_counter() - self._origin
+        lines = [f"===== PROFILE (wall time {wall:.1f}s; stage times are summed over threads) =====",
+                 f"{'stage':<16}{'count':>8}{'total s':>10}{'mean ms':>10}{'max ms':>10}"]
+        for stage, (count, total, longest) in sorted(stages.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{stage:<16}{count:>8}{total:>10.2f}{total / count * 1000:>10.1f}{longest * 1000:>10.1f}")
+        prompt_tokens = counters.get("prompt_tokens", 0)
+        completion_tokens = counters.get("completion_tokens", 0)
+        usage_by_model = {}
+        for name, count in counters.items():
+            kind, _, model = name.partition(":")
+            if model and kind in ("prompt_tokens", "completion_tokens"):
+                usage_by_model.setdefault(model, {"prompt_tokens": 0, "completion_tokens": 0})[kind] = count
+        # Tokens not attributed to a model are priced at the default prices.
+        unattributed = (prompt_tokens - sum(usage["prompt_tokens"] for usage in usage_by_model.values()),
+                        completion_tokens - sum(usage["completion_tokens"] for usage in usage_by_model.values()))
+        cost = (unattributed[0] * PRICE_PER_M_PROMPT_TOKENS
+                + unattributed[1] * PRICE_PER_M_COMPLETION_TOKENS) / 1_000_000
+        model_costs = {}
+        for model, usage in usage_by_model.items():
+            prompt_price, completion_price = model_price(model)
+            model_costs[model] = (usage["prompt_tokens"] * prompt_price
+                                  + usage["completion_tokens"] * completion_price) / 1_000_000
+            cost += model_costs[model]
+        lines.append(f"API calls: {counters.get('api_calls', 0)}, retries: {counters.get('retries', 0)}, "
+                     f"cache hits: {counters.get('cache_hits', 0)}, cache misses: {counters.get('cache_misses', 0)}")
+        by_model = {name.partition(":")[2]: count for name, count in counters.items()
+                    if name.startswith("api_calls:")}
+        if len(by_model) > 1:
+            lines.append("API calls by model: " + ", ".join(f"{model} {count}" for model, count in sorted(by_model.items())))
+        lines.append(f"Tokens: {prompt_tokens} prompt + {completion_tokens} completion "
+                     f"(estimated cost ${cost:.4f})")
+        if len(usage_by_model) > 1:
+            lines.append("Tokens by model: " + ", ".join(
+                f"{model} {usage['prompt_tokens']} + {usage['completion_tokens']} (${model_costs[model]:.4f})"
+                for model, usage in sorted(usage_by_model.items())))
+        if self.trace_path:
+            lines.append(f"Trace written to {self.trace_path}")
+        return "\n".join(lines)
+
+
+# Shared profiler, enabled by main.py's --profile flag.
+profiler = Profiler()
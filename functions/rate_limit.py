@@ -0,0 +1,133 @@
+import os
+import time
+import random
+import asyncio
+import datetime
+import threading
+from email.utils import parsedate_to_datetime
+
+from .profiling import profiler
+
+# -----------------------------
+# Retry and Rate-Limit Settings
+# -----------------------------
+MAX_RETRIES = int(os.environ.get("SUMMARY_MAX_RETRIES", 5))
+REQUEST_TIMEOUT = float(os.environ.get("SUMMARY_REQUEST_TIMEOUT", 120))
+# Requests per second allowed towards the API; 0 disables client-side rate limiting.
+REQUESTS_PER_SECOND = float(os.environ.get("SUMMARY_REQUESTS_PER_SECOND", 0))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter usable from threads and from asyncio code.
+
+    Tokens refill continuously at 'rate' per second up to 'capacity'. Acquiring a token
+    reserves it immediately (the balance may go negative), and the caller then sleeps for
+    however long it takes the bucket to pay that reservation back.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens=1):
+        """Take tokens from the bucket and return the number of seconds to wait for them."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+# Shared limiter for every summarization request of the process.
+request_bucket = TokenBucket(REQUESTS_PER_SECOND)
+
+
+def get_status_code(error):
+    """Return the HTTP status code carried by an SDK/HTTP error, or None."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        raw_response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+        status = getattr(raw_response, "status_code", None)
+    return status
+
+
+def get_retry_after(error):
+    """
+    Return the delay in seconds requested by the server through the Retry-After header
+    (either a number of seconds or an HTTP date), or None if there is none.
+    """
+    raw_response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+    headers = getattr(raw_response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = datetime.datetime.now(retry_at.tzinfo or datetime.timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def is_retryable(error):
+    """Return True for rate-limit, server-side and transient network errors."""
+    status = get_status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    # The Mistral SDK surfaces network failures as httpx exceptions.
+    return type(error).__module__.split(".")[0] in ("httpx", "httpcore")
+
+
+def retry_delay(error, attempt):
+    """
+    Seconds to wait before retry number 'attempt' (starting at 0): the server's Retry-After
+    if given, otherwise exponential backoff with full jitter capped at BACKOFF_MAX.
+    """
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def plan_retry(error, attempt, max_retries=MAX_RETRIES):
+    """
+    Retry policy shared by the sync and async clients. Return the seconds to wait before
+    retrying a request that failed with 'error' on attempt 'attempt' (starting at 0), or
+    None when it must not be retried (not retryable, or max_retries reached).
+    """
+    if attempt >= max_retries or not is_retryable(error):
+        return None
+    delay = retry_delay(error, attempt)
+    print(f"Summary request failed ({error}); retrying in {delay:.1f}s")
+    profiler.count("retries")
+    return delay
@@ -0,0 +1,47 @@
+import os
+
+from .genai_summary import generate_summary
+from .scheduler import run_parallel
+from .profiling import profiler
+from .tokens import estimate_tokens, pack_items, PROMPT_TOKEN_BUDGET
+
+# -----------------------------
+# Hierarchical Reduce Settings
+# -----------------------------
+# Maximum number of summaries combined by a single summarization call. Larger sets are
+# reduced level by level: batches of at most FAN_IN summaries are summarized in parallel,
+# then the batch summaries are combined, until everything fits in one call.
+FAN_IN = int(os.environ.get("SUMMARY_FAN_IN", 16))
+
+
+def set_fan_in(fan_in):
+    """Change the maximum number of summaries combined by one summarization call."""
+    global FAN_IN
+    FAN_IN = max(2, int(fan_in))
+
+
+def reduce_summaries(parts, fan_in=None, max_tokens=None, call_type="folder"):
+    """
+    Summarize a list of partial summaries (file, pack or subfolder summaries) into one.
+
+    While the parts are more than 'fan_in' or do not fit in 'max_tokens', they are grouped,
+    in order, into batches of at most fan_in parts fitting the budget, and every batch is
+    summarized (in parallel). The batch summaries become the parts of the next level.
+    Once the parts fit, they are summarized by a single final call, of the given
+    'call_type' (see routing.CALL_TYPES; intermediate batches are 'reduce' calls).
+    """
+    fan_in = max(2, fan_in or FAN_IN)
+    max_tokens = max_tokens or PROMPT_TOKEN_BUDGET
+    parts = list(parts)
+    level = 0
+    while len(parts) > fan_in or sum(estimate_tokens(part) + 1 for part in parts) > max_tokens:
+        level += 1
+        batches = pack_items(parts, max_tokens, max_items=fan_in)
+        print(f"Reduce level {level}: summarizing {len(parts)} parts in {len(batches)} batches")
+
+        def summarize_batch(batch):
+            batch_summary = generate_summary("\n".join(batch), call_type="reduce")
+            return f"--- Summary of {len(batch)} part(s) ---\n{batch_summary}\n"
+        with profiler.span("reduce_level", level=level, parts=len(parts), batches=len(batches)):
+            parts = run_parallel(summarize_batch, batches)
+    return generate_summary("\n".join(parts), call_type=call_type)
@@ -0,0 +1,127 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from .backends import MISTRAL_MODEL
+from .rate_limit import TokenBucket
+
+# -----------------------------
+# Model Routing Settings
+# -----------------------------
+# Kinds of summarization calls: a file (or a pack of small files), a chunk of an oversized
+# file, a folder, an intermediate reduce batch, and the repository root.
+CALL_TYPES = ('file', 'chunk', 'folder', 'reduce', 'root')
+# With routing on, calls of SMALL_MODEL_CALLS types whose prompt is at most
+# SMALL_MODEL_MAX_TOKENS go to SMALL_MODEL; every other call goes to LARGE_MODEL.
+# With routing off, every call goes to the backend's own model.
+ROUTING_ENABLED = os.environ.get("SUMMARY_ROUTING", "off") == "on"
+SMALL_MODEL = os.environ.get("SUMMARY_SMALL_MODEL", "mistral-small-latest")
+LARGE_MODEL = os.environ.get("SUMMARY_LARGE_MODEL", MISTRAL_MODEL)
+SMALL_MODEL_MAX_TOKENS = int(os.environ.get("SUMMARY_SMALL_MODEL_MAX_TOKENS", 8000))
+SMALL_MODEL_CALLS = os.environ.get("SUMMARY_SMALL_MODEL_CALLS", "file,chunk,folder")
+# Per-model limits, as 'model=max_in_flight[:requests_per_second],...'
+# (e.g. 'mistral-small-latest=8:10,mistral-large-latest=2'). These apply on top of the
+# process-wide --max_concurrency and SUMMARY_REQUESTS_PER_SECOND limits.
+MODEL_LIMITS = os.environ.get("SUMMARY_MODEL_LIMITS", "")
+
+
+class RoutingPolicy:
+    """Picks the model answering a call from its type and estimated prompt size."""
+
+    def __init__(self, small_model=SMALL_MODEL, large_model=LARGE_MODEL,
+                 small_max_tokens=SMALL_MODEL_MAX_TOKENS, small_call_types=SMALL_MODEL_CALLS):
+        if isinstance(small_call_types, str):
+            small_call_types = [name.strip() for name in small_call_types.split(",") if name.strip()]
+        unknown = set(small_call_types) - set(CALL_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown call types {sorted(unknown)} (expected some of {', '.join(CALL_TYPES)})")
+        self.small_model = small_model
+        self.large_model = large_model
+        self.small_max_tokens = small_max_tokens
+        self.small_call_types = frozenset(small_call_types)
+
+    def choose(self, call_type, tokens):
+        if call_type in self.small_call_types and tokens <= self.small_max_tokens:
+            return self.small_model
+        return self.large_model
+
+    def signature(self):
+        """
+        Describe the policy in one string, recorded as the 'model' of runs, incremental
+        state and file cache keys, so that changing the routing invalidates them.
+        """
+        small_calls = "+".join(sorted(self.small_call_types))
+        return f"{self.small_model}[{small_calls}<={self.small_max_tokens}]|{self.large_model}"
+
+
+def parse_model_limits(spec):
+    """Parse 'model=max_in_flight[:requests_per_second],...' into {model: (max_in_flight, rate)}."""
+    limits = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        model, _, values = entry.strip().partition("=")
+        in_flight, _, rate = values.partition(":")
+        limits[model.strip()] = (int(in_flight) if in_flight else 0, float(rate) if rate else 0.0)
+    return limits
+
+
+class ModelLimiter:
+    """Per-model caps on in-flight calls and requests per second."""
+
+    def __init__(self, limits=None):
+        self._slots = {}
+        self._buckets = {}
+        for model, (in_flight, rate) in (limits or {}).items():
+            if in_flight:
+                self._slots[model] = threading.BoundedSemaphore(in_flight)
+            if rate:
+                self._buckets[model] = TokenBucket(rate)
+
+    def acquire_rate(self, model):
+        """Wait until 'model' may receive another request."""
+        bucket = self._buckets.get(model)
+        if bucket is not None:
+            bucket.acquire()
+
+    async def acquire_rate_async(self, model):
+        bucket = self._buckets.get(model)
+        if bucket is not None:
+            await bucket.acquire_async()
+
+    @contextmanager
+    def slot(self, model):
+        """Hold one of the in-flight slots of 'model' (if it is limited) for the block."""
+        slots = self._slots.get(model)
+        if slots is None:
+            yield
+            return
+        with slots:
+            yield
+
+
+_policy = RoutingPolicy() if ROUTING_ENABLED else None
+model_limiter = ModelLimiter(parse_model_limits(MODEL_LIMITS))
+
+
+def configure_routing(enabled=True, small_model=None, large_model=None, small_max_tokens=None,
+                      small_call_types=None, model_limits=None):
+    """Turn routing on (with optional overrides of the settings above) or off, and set model limits."""
+    global _policy, model_limiter
+    if enabled:
+        _policy = RoutingPolicy(
+            small_model=small_model or SMALL_MODEL,
+            large_model=large_model or LARGE_MODEL,
+            small_max_tokens=small_max_tokens if small_max_tokens is not None else SMALL_MODEL_MAX_TOKENS,
+            small_call_types=small_call_types if small_call_types is not None else SMALL_MODEL_CALLS,
+        )
+    else:
+        _policy = None
+    if model_limits is not None:
+        model_limiter = ModelLimiter(parse_model_limits(model_limits))
+    return _policy
+
+
+def get_policy():
+    """Return the active RoutingPolicy, or None when routing is off."""
+    return _policy
@@ -0,0 +1,87 @@
+import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# -----------------------------
+# Concurrency Settings
+# -----------------------------
+# Maximum number of API calls in flight at once, shared by every worker in the process.
+max_concurrency = int(os.environ.get("SUMMARY_MAX_CONCURRENCY", 4))
+_api_slots = threading.BoundedSemaphore(max_concurrency)
+
+
+def set_max_concurrency(limit):
+    """Change the process-wide limit on concurrent API calls (and default worker counts)."""
+    global max_concurrency, _api_slots
+    max_concurrency = max(1, int(limit))
+    _api_slots = threading.BoundedSemaphore(max_concurrency)
+
+
+@contextmanager
+def api_slot():
+    """Hold one of the max_concurrency API slots for the duration of the block."""
+    slots = _api_slots
+    with slots:
+        yield
+
+
+def run_parallel(fn, items, max_workers=None):
+    """
+    Apply fn to every item on a thread pool and return the results in input order.
+    Falls back to a plain loop when there is nothing to parallelize.
+    """
+    items = list(items)
+    workers = min(len(items), max_workers or max_concurrency)
+    if workers <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def run_bottom_up(root, process_node, max_workers=None):
+    """
+    Run process_node(node, child_results) on every node of a FolderNode tree, children first.
+
+    A node is scheduled as soon as all of its subfolders are done, so independent siblings
+    (and cousins) run concurrently on a pool of max_workers threads while the bottom-up
+    dependency order is preserved. child_results follows the order of node.subfolders.
+    Returns the result of process_node for the root.
+    """
+    parents = {}
+    pending = {}
+    leaves = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        pending[id(node)] = len(node.subfolders)
+        if not node.subfolders:
+            leaves.append(node)
+        for child in node.subfolders:
+            parents[id(child)] = node
+            stack.append(child)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers or max_concurrency) as pool:
+        def submit(node):
+            child_results = [results.pop(id(child)) for child in node.subfolders]
+            return pool.submit(process_node, node, child_results)
+
+        in_flight = {submit(node): node for node in leaves}
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = in_flight.pop(future)
+                try:
+                    results[id(node)] = future.result()
+                except BaseException:
+                    for other in in_flight:
+                        other.cancel()
+                    raise
+                parent = parents.get(id(node))
+                if parent is None:
+                    continue
+                pending[id(parent)] -= 1
+                if pending[id(parent)] == 0:
+                    in_flight[submit(parent)] = parent
+    return results[id(root)]
@@ -0,0 +1,60 @@
+import os
+import threading
+
+# -----------------------------
+# Mounted File Sources
+# -----------------------------
+# Folder trees do not always live on disk: an archive can be mounted under a virtual root
+# path (e.g. the archive's own path), and every path below that root is then served by the
+# archive instead of the file system. Ingestion reads files through open_binary/get_size,
+# so summarization works the same for both.
+_mounts = {}
+_mounts_lock = threading.Lock()
+
+
+def mount(root, source):
+    """Serve every path below 'root' from 'source' (an object with open/size/digest methods)."""
+    with _mounts_lock:
+        _mounts[os.path.normpath(root)] = source
+
+
+def unmount(root):
+    with _mounts_lock:
+        _mounts.pop(os.path.normpath(root), None)
+
+
+def resolve(path):
+    """Return (source, member path) if 'path' lies below a mounted root, else (None, path)."""
+    if not _mounts:
+        return None, path
+    path = os.path.normpath(path)
+    with _mounts_lock:
+        mounts = list(_mounts.items())
+    for root, source in mounts:
+        if path.startswith(root + os.sep):
+            return source, path[len(root) + 1:].replace(os.sep, '/')
+    return None, path
+
+
+def open_binary(path):
+    """Open a file for binary reading, from its mounted source or from disk."""
+    source, member = resolve(path)
+    if source is None:
+        return open(path, 'rb')
+    return source.open(member)
+
+
+def get_size(path):
+    """Return the size in bytes of a file, from its mounted source or from disk."""
+    source, member = resolve(path)
+    if source is None:
+        return os.path.getsize(path)
+    return source.size(member)
+
+
+def get_digest(path):
+    """Return the SHA-256 digest known by the file's mounted source, or None for files on disk."""
+    source, member = resolve(path)
+    if source is None:
+        return None
+    return source.digest(member)
@@ -0,0 +1,149 @@
+import os
+import hashlib
+import tempfile
+import threading
+
+# -----------------------------
+# Cache Settings
+# -----------------------------
+DEFAULT_CACHE_DIR = os.environ.get("SUMMARY_CACHE_DIR", ".summary_cache")
+DEFAULT_MAX_BYTES = int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# After an eviction pass the cache is trimmed down to this fraction of max_bytes,
+# so that we do not rescan the directory on every single write.
+EVICTION_LOW_WATERMARK = 0.8
+
+
+class SummaryCache:
+    """
+    Persistent, content-addressed store of generated summaries.
+
+    Entries live under cache_dir as one small text file per key, sharded by the first
+    two hex characters of the key. A cache hit refreshes the entry's mtime, so eviction
+    (oldest mtime first) behaves like an LRU once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts):
+        """Hash the given text parts (model name, prompt, ...) into a cache key."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8", errors="replace"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".txt")
+
+    def get(self, key):
+        """Return the cached summary for key, or None if it is not cached."""
+        if not self.enabled:
+            return None
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries if needed."""
+        if not self.enabled or value is None:
+            return
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so that concurrent readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(value)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        new_size = os.path.getsize(path)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += new_size - old_size
+            needs_eviction = self._total_bytes > self.max_bytes
+        if needs_eviction:
+            self.evict()
+
+    def _iter_entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir(follow_symlinks=False):
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".txt"):
+                    yield entry
+
+    def _scan_size(self):
+        return sum(entry.stat().st_size for entry in self._iter_entries())
+
+    def evict(self):
+        """Delete the least recently used entries until the cache is below its low watermark."""
+        with self._lock:
+            entries = []
+            for entry in self._iter_entries():
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * EVICTION_LOW_WATERMARK
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._total_bytes = total
+
+
+# Shared cache used by generate_summary and process_file.
+summary_cache = SummaryCache()
+# Text extracted from files before summarization (e.g. notebook sources), by file hash.
+SOURCE_CACHE_SUBDIR = "sources"
+source_cache = SummaryCache(os.path.join(DEFAULT_CACHE_DIR, SOURCE_CACHE_SUBDIR))
+
+
+def configure_cache(cache_dir=None, max_bytes=None, enabled=True):
+    """
+    Point the shared summary cache at another directory, size limit, or disable it.
+    The extracted-source cache follows it, in the 'sources' subdirectory.
+    """
+    with summary_cache._lock:
+        if cache_dir is not None:
+            summary_cache.cache_dir = cache_dir
+            summary_cache._total_bytes = None
+        if max_bytes is not None:
+            summary_cache.max_bytes = max_bytes
+        summary_cache.enabled = enabled
+    with source_cache._lock:
+        if cache_dir is not None:
+            source_cache.cache_dir = os.path.join(cache_dir, SOURCE_CACHE_SUBDIR)
+            source_cache._total_bytes = None
+        if max_bytes is not None:
+            source_cache.max_bytes = max_bytes
+        source_cache.enabled = enabled
+    return summary_cache
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from .folder_tree import FolderNode, node_key
+
+# -----------------------------
+# Summary Store Settings
+# -----------------------------
+# SQLite database holding every run's global summary, per-folder summaries and metadata,
+# with a full-text index over the summaries.
+STORE_PATH = os.environ.get("SUMMARY_STORE_PATH", os.path.join("example_repos", "summaries.db"))
+# Number of runs kept per repository; older runs and their folder summaries are deleted.
+KEEP_RUNS = int(os.environ.get("SUMMARY_STORE_KEEP_RUNS", 5))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    source TEXT,
+    model TEXT,
+    commit_id TEXT,
+    started_at REAL,
+    finished_at REAL NOT NULL,
+    folders INTEGER,
+    files INTEGER,
+    global_summary TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_repo ON runs (repo, finished_at);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    key TEXT NOT NULL,
+    parent TEXT,
+    name TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    files INTEGER,
+    summary TEXT,
+    UNIQUE (run_id, key)
+);
+CREATE INDEX IF NOT EXISTS nodes_parent ON nodes (run_id, parent);
+CREATE VIRTUAL TABLE IF NOT EXISTS node_fts USING fts5 (summary, content='nodes', content_rowid='id');
+"""
+
+
+def _parent_key(key):
+    if key == ".":
+        return None
+    parent = key.rpartition("/")[0]
+    return parent or "."
+
+
+class SummaryStore:
+    """
+    Indexed store of generated summaries, one SQLite file shared by main.py and app.py.
+
+    Each saved run records the repository, source, model, commit, timestamps and global
+    summary, and one row per folder keyed by its path relative to the repository root
+    ('.' for the root, 'a/b' below it), so that folders can be listed lazily by parent or
+    path prefix. Folder summaries are indexed with FTS5 for full-text search. Only the
+    KEEP_RUNS latest runs of each repository are kept.
+    """
+
+    def __init__(self, path=STORE_PATH, keep_runs=KEEP_RUNS):
+        self.path = path
+        self.keep_runs = keep_runs
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+    def save_run(self, repo, tree, global_summary, source=None, model=None, commit=None, started_at=None):
+        """Store a finished run and the summaries of all its folders. Returns the run id."""
+        def rows(run_id):
+            stack = [tree]
+            while stack:
+                node = stack.pop()
+                key = node_key(node, tree)
+                depth = 0 if key == "." else key.count("/") + 1
+                yield run_id, key, _parent_key(key), node.name, depth, len(node.files), node.summary
+                stack.extend(node.subfolders)
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (repo, source, model, commit_id, started_at, finished_at, global_summary) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (repo, source, model, commit, started_at, time.time(), global_summary))
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO nodes (run_id, key, parent, name, depth, files, summary) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows(run_id))
+            self._conn.execute(
+                "UPDATE runs SET folders = (SELECT COUNT(*) FROM nodes WHERE run_id = ?), "
+                "files = (SELECT SUM(files) FROM nodes WHERE run_id = ?) WHERE id = ?",
+                (run_id, run_id, run_id))
+            self._conn.execute(
+                "INSERT INTO node_fts (rowid, summary) SELECT id, summary FROM nodes "
+                "WHERE run_id = ? AND summary IS NOT NULL", (run_id,))
+            self._prune(repo)
+        return run_id
+
+    def _prune(self, repo):
+        old_runs = [row["id"] for row in self._conn.execute(
+            "SELECT id FROM runs WHERE repo = ? ORDER BY finished_at DESC LIMIT -1 OFFSET ?",
+            (repo, max(1, self.keep_runs)))]
+        for run_id in old_runs:
+            self._conn.execute(
+                "INSERT INTO node_fts (node_fts, rowid, summary) SELECT 'delete', id, summary FROM nodes "
+                "WHERE run_id = ? AND summary IS NOT NULL", (run_id,))
+            self._conn.execute("DELETE FROM nodes WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def list_repos(self):
+        """Return the latest run of every repository (without summaries), most recent first."""
+        return self._query(
+            "SELECT id, repo, source, model, commit_id, started_at, finished_at, folders, files FROM runs "
+            "WHERE id IN (SELECT id FROM runs r WHERE r.repo = runs.repo ORDER BY finished_at DESC LIMIT 1) "
+            "ORDER BY finished_at DESC")
+
+    def latest_run_id(self, repo):
+        rows = self._query("SELECT id FROM runs WHERE repo = ? ORDER BY finished_at DESC LIMIT 1", (repo,))
+        return rows[0]["id"] if rows else None
+
+    def get_global_summary(self, repo, run_id=None):
+        run_id = run_id or self.latest_run_id(repo)
+        rows = self._query("SELECT global_summary FROM runs WHERE id = ?", (run_id,))
+        return rows[0]["global_summary"] if rows else None
+
+    def list_children(self, repo, key=".", run_id=None):
+        """Return the direct subfolders of folder 'key' (key, name, files), in name order."""
+        run_id = run_id or self.latest_run_id(repo)
+        return self._query("SELECT key, name, files FROM nodes WHERE run_id = ? AND parent = ? ORDER BY name",
+                           (run_id, key))
+
+    def list_nodes(self, repo, prefix="", limit=200, run_id=None):
+        """Return up to 'limit' folder keys starting with 'prefix' (e.g. 'src/'), in key order."""
+        run_id = run_id or self.latest_run_id(repo)
+        # A key range rather than LIKE, so that the (run_id, key) index is used.
+        return [row["key"] for row in self._query(
+            "SELECT key FROM nodes WHERE run_id = ? AND key >= ? AND key < ? ORDER BY key LIMIT ?",
+            (run_id, prefix, prefix + "\U0010ffff", limit))]
+
+    def get_node_summary(self, repo, key, run_id=None):
+        run_id = run_id or self.latest_run_id(repo)
+        rows = self._query("SELECT summary FROM nodes WHERE run_id = ? AND key = ?", (run_id, key))
+        return rows[0]["summary"] if rows else None
+
+    def search(self, query, repo=None, limit=20, all_runs=False):
+        """
+        Full-text search (FTS5 query syntax) over folder summaries, best matches first.
+        Searches the latest run of each repository unless all_runs=True.
+        Returns dicts with repo, run_id, finished_at, key and a highlighted snippet.
+        """
+        sql = ("SELECT runs.repo, runs.id AS run_id, runs.finished_at, nodes.key, "
+               "snippet(node_fts, 0, '**', '**', ' … ', 16) AS snippet "
+               "FROM node_fts JOIN nodes ON nodes.id = node_fts.rowid JOIN runs ON runs.id = nodes.run_id "
+               "WHERE node_fts MATCH ?")
+        params = [query]
+        if repo is not None:
+            sql += " AND runs.repo = ?"
+            params.append(repo)
+        if not all_runs:
+            sql += " AND runs.id = (SELECT id FROM runs r WHERE r.repo = runs.repo ORDER BY finished_at DESC LIMIT 1)"
+        sql += " ORDER BY bm25(node_fts) LIMIT ?"
+        params.append(limit)
+        return self._query(sql, params)
+
+
+def import_saved_outputs(store, output_dir):
+    """
+    Import the summary_<repo>.txt / summary_tree_<repo>.json files written by earlier runs
+    for repositories the store does not know yet. Returns the imported repository names.
+    """
+    known = {run["repo"] for run in store.list_repos()}
+    imported = []
+    for file_name in sorted(os.listdir(output_dir)):
+        if not (file_name.startswith("summary_tree_") and file_name.endswith(".json")):
+            continue
+        repo = file_name[len("summary_tree_"):-len(".json")]
+        if repo in known:
+            continue
+        tree_path = os.path.join(output_dir, file_name)
+        with open(tree_path, "r", encoding="utf-8") as f:
+            flattened = json.load(f)
+        summary_path = os.path.join(output_dir, f"summary_{repo}.txt")
+        global_summary = None
+        if os.path.exists(summary_path):
+            with open(summary_path, "r", encoding="utf-8") as f:
+                global_summary = f.read()
+        # Rebuild the folder tree from the hierarchical names ("root > a > b").
+        nodes = {}
+        root = None
+        for full_name, summary in flattened.items():
+            parts = full_name.split(" > ")
+            parent = nodes.get(tuple(parts[:-1]))
+            node = FolderNode(parts[-1], path=parts[-1] if parent is None else None)
+            node.summary = summary
+            if parent is None:
+                root = root or node
+            else:
+                parent.add_subfolder(node)
+            nodes[tuple(parts)] = node
+        if root is not None:
+            store.save_run(repo, root, global_summary, source=tree_path,
+                           started_at=os.path.getmtime(tree_path))
+            imported.append(repo)
+    return imported
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the shared store at STORE_PATH, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SummaryStore()
+        return _store
@@ -0,0 +1,62 @@
+import os
+
+# -----------------------------
+# Token Budget Settings
+# -----------------------------
+# Maximum estimated number of tokens of text sent in a single summarization prompt.
+# mistral-large has a 128k-token context; the rest is left for the prompt wrapper
+# and the generated summary.
+PROMPT_TOKEN_BUDGET = int(os.environ.get("SUMMARY_PROMPT_TOKEN_BUDGET", 96000))
+# Average number of characters per token used by the fast local approximation.
+# Source code tokenizes denser than English prose (roughly 3-4 characters per token).
+CHARS_PER_TOKEN = 3.5
+
+_tokenizer = None
+
+
+def set_tokenizer(count_tokens):
+    """
+    Plug in an exact tokenizer: a callable taking a string and returning its number of tokens
+    (e.g. wrapping the model's own tokenizer). Pass None to go back to the fast approximation.
+    """
+    global _tokenizer
+    _tokenizer = count_tokens
+
+
+def approximate_tokens(text):
+    """Fast, allocation-free token estimate based on the character count."""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def estimate_tokens(text):
+    """Estimate the number of tokens of 'text' with the configured tokenizer."""
+    if _tokenizer is not None:
+        return _tokenizer(text)
+    return approximate_tokens(text)
+
+
+def pack_items(items, max_tokens=None, size=estimate_tokens, max_items=None):
+    """
+    Greedily group consecutive items into packs whose total size stays within max_tokens
+    and, if max_items is given, that hold at most max_items items.
+    'size' returns an item's token count (by default, items are texts and are estimated).
+    An item larger than max_tokens on its own gets a pack of its own.
+    Returns a list of lists of items, preserving the input order.
+    """
+    max_tokens = max_tokens or PROMPT_TOKEN_BUDGET
+    packs = []
+    current = []
+    current_tokens = 0
+    for item in items:
+        tokens = size(item)
+        full = max_items is not None and len(current) >= max_items
+        if current and (full or current_tokens + tokens > max_tokens):
+            packs.append(current)
+            current = []
+            current_tokens = 0
+        current.append(item)
+        # One extra token for the separator between items.
+        current_tokens += tokens + 1
+    if current:
+        packs.append(current)
+    return packs
@@ -1,13 +1,15 @@
 import os
-import json
 import subprocess
 import tempfile
-import shutil
+import time
 import datetime
 
-from functions.folder_tree import FolderNode, build_folder_tree, flatten_tree
+from functions.folder_tree import FolderNode, build_folder_tree, write_flattened_tree, iter_flatten_tree, node_key
 from functions.files_exclusion import load_gitignore
 from functions.folder_summarization import summarize_folder
+from functions.clone_manager import clone_manager
+from functions.summary_store import get_store
+from functions.genai_summary import current_model
 
 # Folder where summary tree structures will be saved.
 EXAMPLE_REPOS_DIR = "../example_repos"
@@ -30,42 +32,77 @@ def get_repo_or_folder_name(path_or_url: str, mode: str) -> str:
 # -----------------------------
 # Repository Summarization Functions
 # -----------------------------
-def summarize_repo(repo_url: str) -> (str, FolderNode):
+def summarize_repo(repo_url: str, rev: str = "HEAD", on_tree=None, on_summary=None) -> (str, FolderNode):
     """
-    Clone the repository from repo_url, build the folder tree, and generate the summary.
+    Clone the repository from repo_url (at revision 'rev'), build the folder tree, and generate the summary.
+    'on_tree(tree)' is called once the folder tree is built and 'on_summary(folder, summary)'
+    after each folder is summarized (see summarize_folder); either may raise to abort the run.
     Returns a tuple (global_summary_text, root_tree_node).
     """
     temp_dir = tempfile.mkdtemp(prefix="repo_")
     try:
-        subprocess.run(["git", "clone", repo_url, temp_dir], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        clone_manager.checkout(repo_url, temp_dir, rev=rev)
     except subprocess.CalledProcessError as e:
-        shutil.rmtree(temp_dir)
+        clone_manager.release(temp_dir)
         return f"Error cloning repository: {e}", None
     repo_root = temp_dir
-    gitignore_spec = load_gitignore(repo_root)
-    tree = build_folder_tree(repo_root, repo_root, gitignore_spec)
-    global_summary = summarize_folder(tree)
-    shutil.rmtree(temp_dir)
+    try:
+        gitignore_spec = load_gitignore(repo_root)
+        tree = build_folder_tree(repo_root, repo_root, gitignore_spec)
+        if on_tree is not None:
+            on_tree(tree)
+        global_summary = summarize_folder(tree, on_summary=on_summary)
+    finally:
+        clone_manager.release(temp_dir)
     return global_summary, tree
 
-def run_repo_summary(repo_url: str) -> str:
+def run_repo_summary(repo_url: str, rev: str = "HEAD", on_tree=None, on_summary=None) -> str:
     """
     Function intended for Gradio: it runs the summarization on a repo, saves the global summary and
-    the flattened summary tree, and returns the global summary text along with file save locations.
+    the flattened summary tree, records the run in the summary store, and returns the global summary
+    text along with file save locations.
     """
     repo_name = get_repo_or_folder_name(repo_url, 'repo')
-    summary_text, tree = summarize_repo(repo_url)
+    started_at = time.time()
+    summary_text, tree = summarize_repo(repo_url, rev=rev, on_tree=on_tree, on_summary=on_summary)
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     summary_file = os.path.join(EXAMPLE_REPOS_DIR, f"{repo_name}_summary_{timestamp}.txt")
     with open(summary_file, "w", encoding="utf-8") as f:
         f.write(summary_text)
     if tree is not None:
-        flattened = flatten_tree(tree)
         tree_file = os.path.join(EXAMPLE_REPOS_DIR, f"{repo_name}_summary_tree_{timestamp}.json")
         with open(tree_file, "w", encoding="utf-8") as f:
-            json.dump(flattened, f, indent=2)
+            write_flattened_tree(tree, f)
+        get_store().save_run(repo_name, tree, summary_text, source=repo_url, model=current_model(),
+                             commit=None if rev == "HEAD" else rev, started_at=started_at)
         return (summary_text + 
                 f"\n\nGlobal summary saved to: {summary_file}" +
                 f"\nSummary tree saved to: {tree_file}")
     else:
-        return summary_text
\ No newline at end of file
+        return summary_text
+
+def run_repo_summary_job(job) -> str:
+    """
+    Run a job_queue.Job: summarize job.repo_url at job.commit with run_repo_summary, reporting
+    progress in summarized folders, publishing each folder summary in job.partial as soon as it
+    is done, and stopping at the next folder once the job is cancelled.
+    """
+    root = {}
+
+    def on_tree(tree):
+        job.check_cancelled()
+        root["tree"] = tree
+        total = sum(1 for _ in iter_flatten_tree(tree))
+        job.set_progress("Summarizing folders", done=0, total=total)
+
+    def on_summary(folder, summary):
+        job.partial[node_key(folder, root["tree"])] = summary
+        job.check_cancelled()
+        job.advance(f"Summarized {folder.name}")
+
+    job.set_progress("Cloning repository")
+    result = run_repo_summary(job.repo_url, rev=job.commit, on_tree=on_tree, on_summary=on_summary)
+    if job.total is None:
+        # The clone failed before the tree could be built; result holds the error.
+        raise RuntimeError(result)
+    return result
@@ -1,39 +1,372 @@
 import os
-import json
+import shutil
 import subprocess
 import tempfile
-import stat
-import shutil
 import argparse
-import zipfile
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from functions.folder_tree import FolderNode, build_folder_tree, flatten_tree
+from functions.folder_tree import FolderNode, build_folder_tree, write_flattened_tree, node_key, iter_tree_lines
 from functions.files_exclusion import load_gitignore
 from functions.folder_summarization import summarize_folder
 from functions.utils import get_repo_or_folder_name
-
-def remove_readonly(func, path, _):
-    """Change the file permission and retry deletion."""
-    os.chmod(path, stat.S_IWRITE)
-    func(path)
-
-LANGUAGE_TAGS = {
-    '.py': 'python',
-    '.js': 'javascript',
-    '.ts': 'typescript',
-    '.java': 'java',
-    '.c': 'c',
-    '.cpp': 'cpp',
-    '.html': 'html',
-    '.css': 'css',
-    '.sh': 'bash',
-}
+from functions.summary_cache import configure_cache, summary_cache
+from functions.scheduler import set_max_concurrency
+from functions.reduce import set_fan_in
+from functions.extractors import set_skeleton_mode, SKELETON_MODES
+from functions.routing import configure_routing, get_policy
+from functions.dedup import DuplicateIndex, dedup_stats
+from functions.profiling import profiler
+from functions.summary_store import get_store
+from functions.genai_summary import current_model
+from functions.events import summary_events
+from functions.incremental import state_file_path, load_state, save_state, plan_incremental_run, get_head_commit
+from functions.checkpoint import CheckpointJournal, journal_file_path
+from functions.clone_manager import clone_manager, configure_clone_manager
+from functions.archive_source import ArchiveSource, ArchiveError, is_archive, archive_base_name
 
 EXAMPLE_REPOS_DIR = "example_repos"
 if not os.path.exists(EXAMPLE_REPOS_DIR):
     os.makedirs(EXAMPLE_REPOS_DIR)
 
 
+# -----------------------------
+# Summarization With Incremental State
+# -----------------------------
+def summarize_tree(tree, repo_root, repo_name, incremental=False, resume=False, dedup=True, near_dedup=False):
+    """
+    Summarize the folder tree and save its summary state (commit, per-folder fingerprints
+    and summaries). With incremental=True, folders unchanged since the previous run keep
+    their previous summary and only changed folders and their ancestors are re-summarized.
+
+    Each finished folder is appended to a checkpoint journal while the run progresses; with
+    resume=True, folders completed by an interrupted run (and unchanged since) are reloaded
+    from that journal instead of being summarized again.
+
+    With dedup=True, folders with identical contents are summarized once and files
+    duplicated elsewhere in the tree (identical, or similar with near_dedup=True) are
+    replaced in prompts by a reference to a single summarized copy.
+    Returns (global_summary, commit), commit being the summarized git commit (or None).
+    """
+    state_file = state_file_path(EXAMPLE_REPOS_DIR, repo_name)
+    previous_state = load_state(state_file) if incremental else None
+    with profiler.span("fingerprint", source=repo_name):
+        reuse, fingerprints = plan_incremental_run(tree, previous_state, current_model())
+    if incremental:
+        print(f"Incremental run: reusing {len(reuse)} of {len(fingerprints)} folder summaries")
+    journal = CheckpointJournal(journal_file_path(EXAMPLE_REPOS_DIR, repo_name))
+    if resume:
+        resumed = journal.load(fingerprints)
+        print(f"Resuming: {len(resumed)} folder summaries reloaded from {journal.path}")
+        reuse.update(resumed)
+    journal.open(resume=resume)
+    duplicates = None
+    if dedup:
+        with profiler.span("dedup_index", source=repo_name):
+            duplicates = DuplicateIndex(near=near_dedup).index_tree(tree, fingerprints)
+
+    def checkpoint(node, summary):
+        key = node_key(node, tree)
+        journal.record(key, fingerprints.get(key), summary)
+
+    try:
+        with profiler.span("summarize", source=repo_name):
+            global_summary = summarize_folder(tree, reuse=reuse, on_summary=checkpoint,
+                                              fingerprints=fingerprints if dedup else None,
+                                              duplicates=duplicates)
+    except BaseException:
+        journal.close()
+        print(f"Run interrupted; completed folders are saved in {journal.path} (rerun with --resume)")
+        raise
+    commit = get_head_commit(repo_root)
+    save_state(state_file, tree, fingerprints, commit, current_model())
+    journal.close(remove=True)
+    return global_summary, commit
+
+
+# -----------------------------
+# Per-Source Pipeline: Fetch, Build Tree, Summarize, Save
+# -----------------------------
+class SourceError(Exception):
+    """Raised when a folder, archive or repository cannot be prepared for summarization."""
+
+
+def prepare_source(path_or_url, mode, log=print):
+    """
+    Make the source available on disk: check the local folder (local mode) or clone/update
+    the repository in the temp dir (repo mode).
+    Returns (repo_name, repo_root, cleanup_dir), where cleanup_dir is removed once summarized
+    (see release_checkout).
+    """
+    if mode == 'local':
+        repo_name = get_repo_or_folder_name(path_or_url, 'local')
+        repo_root = os.path.abspath(path_or_url)
+        if not os.path.exists(repo_root) or not os.path.isdir(repo_root):
+            raise SourceError(f"Local folder {repo_root} does not exist or is not a directory.")
+        return repo_name, repo_root, None
+
+    repo_name = get_repo_or_folder_name(path_or_url, 'repo')
+    # A fresh parent directory per checkout (batch workers may clone repositories sharing a
+    # name), while the checkout itself keeps the repository name for the root of the tree.
+    temp_dir = os.path.join(tempfile.mkdtemp(prefix="repo_"), repo_name)
+    log(f"Cloning repository {path_or_url} into {temp_dir}")
+    try:
+        # Fetches into the cached mirror of the repository, then checks out its default branch.
+        with profiler.span("clone", source=path_or_url):
+            clone_manager.checkout(path_or_url, temp_dir)
+    except subprocess.CalledProcessError as e:
+        release_checkout(temp_dir)
+        stderr = e.stderr.decode("utf-8", errors="replace").strip() if e.stderr else ""
+        raise SourceError(f"Error cloning repository: {e} {stderr}".strip())
+    return repo_name, temp_dir, temp_dir
+
+
+def release_checkout(cleanup_dir):
+    """Delete a checkout made by prepare_source, with its temporary parent directory."""
+    clone_manager.release(cleanup_dir)
+    shutil.rmtree(os.path.dirname(cleanup_dir), ignore_errors=True)
+
+
+def source_name(path_or_url, mode):
+    """Return the name a source's outputs are saved under (see summarize_source)."""
+    if mode == 'local' and is_archive(path_or_url):
+        return archive_base_name(path_or_url)
+    return get_repo_or_folder_name(path_or_url, mode)
+
+
+def summarize_source(path_or_url, mode, args, log=print):
+    """
+    Run the whole pipeline for one local folder, archive or repository.
+    Returns (repo_name, global_summary, tree, commit).
+    """
+    if mode == 'local' and is_archive(path_or_url):
+        return summarize_archive(path_or_url, args, log=log)
+    repo_name, repo_root, cleanup_dir = prepare_source(path_or_url, mode, log=log)
+    try:
+        gitignore_spec = load_gitignore(repo_root)
+        log(f"Building folder tree of {repo_name}")
+        with profiler.span("build_tree", source=repo_name):
+            tree = build_folder_tree(repo_root, repo_root, gitignore_spec,
+                                     max_workers=args.walk_workers, use_git=args.use_git_ls_files)
+        log(f"Summarizing {repo_name}")
+        global_summary, commit = summarize_tree(tree, repo_root, repo_name, incremental=args.incremental,
+                                                resume=args.resume, dedup=not args.no_dedup,
+                                                near_dedup=args.near_dedup)
+    finally:
+        # Failed sources are released too, so their checkout does not pin the mirror.
+        if cleanup_dir is not None:
+            release_checkout(cleanup_dir)
+            log(f"Cleaned up temporary repository folder {cleanup_dir}")
+    return repo_name, global_summary, tree, commit
+
+
+def summarize_archive(archive_path, args, log=print):
+    """
+    Summarize a .zip, .tar.gz or .tar.zst archive without extracting it: the folder tree is
+    built from the archive's member list and file contents are read from the archive.
+    Returns (repo_name, global_summary, tree, commit).
+    """
+    log(f"Indexing archive {archive_path}")
+    try:
+        with profiler.span("index_archive", source=archive_path):
+            archive = ArchiveSource(archive_path)
+    except ArchiveError as e:
+        raise SourceError(str(e))
+    with archive:
+        with profiler.span("build_tree", source=archive.name):
+            tree = archive.build_tree()
+        log(f"Summarizing {archive.name}")
+        global_summary, commit = summarize_tree(tree, archive.root_path, archive.name,
+                                                incremental=args.incremental, resume=args.resume,
+                                                dedup=not args.no_dedup, near_dedup=args.near_dedup)
+    return archive.name, global_summary, tree, commit
+
+
+def list_source(path_or_url, mode, args):
+    """
+    Dry run: build the folder tree of a source with the usual exclusion rules and print it,
+    without summarizing anything (and so without needing an API key).
+    """
+    if mode == 'local' and is_archive(path_or_url):
+        try:
+            archive = ArchiveSource(path_or_url)
+        except ArchiveError as e:
+            raise SourceError(str(e))
+        with archive:
+            tree = archive.build_tree()
+    else:
+        _, repo_root, cleanup_dir = prepare_source(path_or_url, mode)
+        try:
+            tree = build_folder_tree(repo_root, repo_root, load_gitignore(repo_root),
+                                     max_workers=args.walk_workers, use_git=args.use_git_ls_files)
+        finally:
+            if cleanup_dir is not None:
+                release_checkout(cleanup_dir)
+    folders = files = 0
+    for line in iter_tree_lines(tree):
+        print(line)
+        if line.endswith("/"):
+            folders += 1
+        else:
+            files += 1
+    print(f"\n{folders} folders, {files} files would be summarized")
+
+
+def save_outputs(repo_name, global_summary, tree, log=print, source=None, started_at=None, commit=None):
+    """
+    Save the global summary text and the flattened summary tree of a source, and record the
+    run (metadata, summarized commit and every folder summary) in the indexed summary store.
+    """
+    with profiler.span("save", source=repo_name):
+        summary_file = os.path.join(EXAMPLE_REPOS_DIR, f"summary_{repo_name}.txt")
+        with open(summary_file, "w", encoding="utf-8") as f:
+            f.write(global_summary)
+        log(f"\nGlobal summary saved to {summary_file}")
+
+        # Also save the flattened summary tree (for subsummaries).
+        tree_file = os.path.join(EXAMPLE_REPOS_DIR, f"summary_tree_{repo_name}.json")
+        with open(tree_file, "w", encoding="utf-8") as f:
+            write_flattened_tree(tree, f)
+        log(f"Summary tree saved to {tree_file}")
+
+        store = get_store()
+        store.save_run(repo_name, tree, global_summary, source=source, model=current_model(),
+                       commit=commit, started_at=started_at)
+        log(f"Run recorded in {store.path}")
+
+
+# -----------------------------
+# Batch Mode: Many Sources in One Process
+# -----------------------------
+def read_manifest(manifest_path):
+    """
+    Read a batch manifest: one local folder, archive or repository URL per line.
+    Blank lines and lines starting with '#' are ignored, and so are repeated entries.
+    Outputs are named after each source, so two different sources with the same name
+    (e.g. two forks of a repository) raise SourceError.
+    Returns a list of (path_or_url, mode) tuples.
+    """
+    entries = []
+    names = {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = line.strip()
+            if not entry or entry.startswith("#"):
+                continue
+            is_url = entry.startswith(("http://", "https://", "ssh://", "git@", "file://")) or entry.endswith(".git")
+            mode = 'repo' if is_url else 'local'
+            source = entry.rstrip("/") if is_url else os.path.abspath(entry)
+            name = source_name(entry, mode)
+            if name in names:
+                if names[name] == source:
+                    print(f"Skipping repeated manifest entry {entry}")
+                    continue
+                raise SourceError(f"Manifest entries {names[name]} and {entry} would both be saved as '{name}'; "
+                                  "summarize one of them in a separate batch.")
+            names[name] = source
+            entries.append((entry, mode))
+    return entries
+
+
+def run_batch(manifest_path, args):
+    """
+    Summarize every source of the manifest in this process.
+
+    Up to args.batch_workers sources go through the pipeline at once, so one repository can
+    be cloned or walked while others are being summarized. All of them share the same API
+    client, summary cache and --max_concurrency limit on in-flight API calls.
+    A failing source is reported and does not stop the batch. Returns the number of failures.
+    """
+    try:
+        entries = read_manifest(manifest_path)
+    except SourceError as e:
+        print(e)
+        return 1
+    total = len(entries)
+    started = time.monotonic()
+    print(f"Batch: {total} sources, {args.batch_workers} in parallel")
+
+    def run_entry(index, path_or_url, mode):
+        label = f"[{index}/{total}] {path_or_url}"
+        entry_started = time.monotonic()
+        log = lambda message: print(f"{label}: {message.strip()}")
+        try:
+            started_at = time.time()
+            repo_name, global_summary, tree, commit = summarize_source(path_or_url, mode, args, log=log)
+            save_outputs(repo_name, global_summary, tree, log=log, source=path_or_url, started_at=started_at,
+                         commit=commit)
+        except Exception as e:
+            log(f"FAILED after {time.monotonic() - entry_started:.1f}s: {e}")
+            return False
+        log(f"done in {time.monotonic() - entry_started:.1f}s")
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, args.batch_workers)) as pool:
+        futures = [pool.submit(run_entry, index, path_or_url, mode)
+                   for index, (path_or_url, mode) in enumerate(entries, start=1)]
+        results = [future.result() for future in futures]
+    failures = results.count(False)
+    print(f"Batch finished in {time.monotonic() - started:.1f}s: "
+          f"{total - failures} succeeded, {failures} failed")
+    print(f"Summary cache: {summary_cache.hits} hits, {summary_cache.misses} misses")
+    print(dedup_stats.report())
+    return failures
+
+
+def list_batch(manifest_path, args):
+    """Dry run of a batch: print the folder tree of every source of the manifest. Returns the number of failures."""
+    try:
+        entries = read_manifest(manifest_path)
+    except SourceError as e:
+        print(e)
+        return 1
+    failures = 0
+    for index, (path_or_url, mode) in enumerate(entries, start=1):
+        print(f"\n[{index}/{len(entries)}] {path_or_url}")
+        try:
+            list_source(path_or_url, mode, args)
+        except SourceError as e:
+            print(e)
+            failures += 1
+    return failures
+
+
+# -----------------------------
+# Live Output (--stream)
+# -----------------------------
+def print_events(events):
+    """Print model answers as they are generated and each folder as it finishes, until None is received."""
+    current_call = None
+    while True:
+        event = events.get()
+        if event is None:
+            return
+        if event["type"] == "token":
+            # Answers of concurrent calls interleave; label each switch to another call.
+            if event["call"] != current_call:
+                current_call = event["call"]
+                print(f"\n[{current_call[:8]}] ", end="")
+            print(event["text"], end="", flush=True)
+        elif event["type"] == "node":
+            current_call = None
+            print(f"\n[{event['done']}/{event['total']} folders] {event['key']} ({event['outcome']})", flush=True)
+
+
+def start_stream():
+    """Start printing summary events in the background. Returns a function stopping it."""
+    events = summary_events.subscribe(tokens=True)
+    printer = threading.Thread(target=print_events, args=(events,), daemon=True)
+    printer.start()
+
+    def stop():
+        summary_events.unsubscribe(events)
+        events.put(None)
+        printer.join()
+        print()
+    return stop
+
+
 # -----------------------------
 # Command-Line Main Function
 # -----------------------------
@@ -43,65 +376,211 @@ def main():
     )
     parser.add_argument(
         '--path_or_url',
-        help="Path to the local folder (for local mode) or GitHub repo URL (for repo mode)."
+        help="Path to the local folder or archive (for local mode), GitHub repo URL (for repo mode) or manifest file (for batch mode)."
     )
     parser.add_argument(
         '--mode',
-        choices=['local', 'repo'],
+        choices=['local', 'repo', 'batch'],
         required=True,
-        help="Mode of operation: 'local' for a folder, 'repo' to clone a GitHub repository."
+        help="Mode of operation: 'local' for a folder, 'repo' to clone a GitHub repository, "
+             "'batch' for every folder, archive and repository listed in a manifest."
+    )
+    parser.add_argument(
+        '--cache_dir',
+        default=None,
+        help="Directory of the persistent summary cache (defaults to SUMMARY_CACHE_DIR or .summary_cache)."
+    )
+    parser.add_argument(
+        '--cache_max_mb',
+        type=int,
+        default=None,
+        help="Maximum size of the summary cache in megabytes; least recently used entries are evicted."
+    )
+    parser.add_argument(
+        '--no_cache',
+        action='store_true',
+        help="Always call the API, ignoring and not updating the summary cache."
+    )
+    parser.add_argument(
+        '--max_concurrency',
+        type=int,
+        default=None,
+        help="Maximum number of summarization API calls in flight at once (default: SUMMARY_MAX_CONCURRENCY or 4)."
+    )
+    parser.add_argument(
+        '--fan_in',
+        type=int,
+        default=None,
+        help="Maximum number of partial summaries combined by one call when reducing a large folder (default: SUMMARY_FAN_IN or 16)."
+    )
+    parser.add_argument(
+        '--routing',
+        action='store_true',
+        help="Route small file, chunk and folder calls to a smaller model and the other calls "
+             "(large folders, reduces, root) to the large model (also SUMMARY_ROUTING=on)."
+    )
+    parser.add_argument(
+        '--small_model',
+        default=None,
+        help="Model used for small calls when routing (default: SUMMARY_SMALL_MODEL or mistral-small-latest)."
+    )
+    parser.add_argument(
+        '--small_max_tokens',
+        type=int,
+        default=None,
+        help="Largest prompt, in estimated tokens, sent to the small model (default: SUMMARY_SMALL_MODEL_MAX_TOKENS or 8000)."
+    )
+    parser.add_argument(
+        '--model_limits',
+        default=None,
+        help="Per-model limits as 'model=max_in_flight[:requests_per_second],...' (default: SUMMARY_MODEL_LIMITS)."
+    )
+    parser.add_argument(
+        '--skeletons',
+        choices=SKELETON_MODES,
+        default=None,
+        help="When to send source files as skeletons (imports, signatures, docstrings) instead of full contents: "
+             "'auto' for folders too large for one prompt, 'always' or 'off' (default: SUMMARY_SKELETON_MODE or auto)."
+    )
+    parser.add_argument(
+        '--no_dedup',
+        action='store_true',
+        help="Send every copy of duplicated files and folders to the model instead of summarizing one copy."
+    )
+    parser.add_argument(
+        '--near_dedup',
+        action='store_true',
+        help="Also collapse near-duplicate files (MinHash similarity above SUMMARY_NEAR_DUP_THRESHOLD, default 0.9)."
+    )
+    parser.add_argument(
+        '--dry_run',
+        action='store_true',
+        help="Only build and print the folder tree that would be summarized; no API calls are made."
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help="Stream the model's answers to the terminal as they are generated and report each folder as soon as it is summarized."
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const=os.path.join(EXAMPLE_REPOS_DIR, "profile_trace.jsonl"),
+        default=None,
+        metavar='TRACE_FILE',
+        help="Record per-stage and per-folder timings, token usage, retries and cache hits: write a "
+             "JSON-lines trace (default: example_repos/profile_trace.jsonl) and print a summary table."
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help="Only re-summarize folders that changed since the previous run (uses git history when available)."
+    )
+    parser.add_argument(
+        '--walk_workers',
+        type=int,
+        default=None,
+        help="Number of threads scanning folders while building the folder tree (default: 1)."
+    )
+    parser.add_argument(
+        '--use_git_ls_files',
+        action='store_true',
+        help="In a git checkout, list files with 'git ls-files' instead of walking the file system."
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help="Continue an interrupted run, reusing the folder summaries saved in its checkpoint journal."
+    )
+    parser.add_argument(
+        '--batch_workers',
+        type=int,
+        default=4,
+        help="In batch mode, number of sources fetched, walked and summarized at the same time (default: 4)."
+    )
+    parser.add_argument(
+        '--clone_cache_dir',
+        default=None,
+        help="Directory of the cached bare mirrors used in repo mode (default: SUMMARY_CLONE_CACHE_DIR)."
+    )
+    parser.add_argument(
+        '--clone_cache_max_mb',
+        type=int,
+        default=None,
+        help="Maximum size of the mirror cache in megabytes; least recently used mirrors are evicted."
+    )
+    parser.add_argument(
+        '--clone_depth',
+        type=int,
+        default=None,
+        help="History depth of the mirrors (e.g. 1 for shallow clones; default 0 keeps the full history)."
     )
     args = parser.parse_args()
+    if args.max_concurrency:
+        set_max_concurrency(args.max_concurrency)
+    if args.fan_in:
+        set_fan_in(args.fan_in)
+    if args.skeletons:
+        set_skeleton_mode(args.skeletons)
+    if args.routing or args.small_model or args.small_max_tokens is not None or args.model_limits:
+        configure_routing(enabled=args.routing or get_policy() is not None, small_model=args.small_model,
+                          small_max_tokens=args.small_max_tokens, model_limits=args.model_limits)
+    configure_clone_manager(
+        cache_dir=args.clone_cache_dir,
+        max_bytes=args.clone_cache_max_mb * 1024 * 1024 if args.clone_cache_max_mb else None,
+        depth=args.clone_depth,
+    )
+    configure_cache(
+        cache_dir=args.cache_dir,
+        max_bytes=args.cache_max_mb * 1024 * 1024 if args.cache_max_mb else None,
+        enabled=not args.no_cache,
+    )
 
-    if args.mode == 'local':
-        if args.path_or_url.endswith(".zip"):
-            with zipfile.ZipFile(args.path_or_url, 'r') as zip_ref:
-                path_split = args.path_or_url.split(".zip")[0]
-                zip_ref.extractall(path_split)
-                args.path_or_url = path_split
-        repo_name = get_repo_or_folder_name(args.path_or_url, 'local')
-        repo_root = os.path.abspath(args.path_or_url)
-        if not os.path.exists(repo_root) or not os.path.isdir(repo_root):
-            print(f"Local folder {repo_root} does not exist or is not a directory.")
-            exit(1)
-        gitignore_spec = load_gitignore(repo_root)
-        tree = build_folder_tree(repo_root, repo_root, gitignore_spec)
-        global_summary = summarize_folder(tree)
-    else:
-        repo_name = get_repo_or_folder_name(args.path_or_url, 'repo')
-        temp_dir = os.path.join(tempfile.gettempdir(), repo_name)
-        print(f"Cloning repository {args.path_or_url} into {temp_dir}")
+    if args.profile:
+        profiler.start(args.profile)
+
+    if args.dry_run and args.mode == 'batch':
+        exit(1 if list_batch(args.path_or_url, args) else 0)
+    if args.dry_run:
         try:
-            if os.path.exists(temp_dir):
-                subprocess.run(["git", "reset", "--hard"], cwd=temp_dir, check=True)
-                subprocess.run(["git", "pull", "origin", "main"], cwd=temp_dir, check=True)
-            else:
-                subprocess.run(["git", "clone", args.path_or_url, temp_dir], check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Error cloning repository: {e}")
-            shutil.rmtree(temp_dir, onerror=remove_readonly)
+            list_source(args.path_or_url, args.mode, args)
+        except SourceError as e:
+            print(e)
             exit(1)
-        repo_root = temp_dir
-        gitignore_spec = load_gitignore(repo_root)
-        tree = build_folder_tree(repo_root, repo_root, gitignore_spec)
-        global_summary = summarize_folder(tree)
-        shutil.rmtree(temp_dir, onerror=remove_readonly)
-        print(f"Cleaned up temporary repository folder {temp_dir}")
+        return
+
+    stop_stream = start_stream() if args.stream else None
+    if args.mode == 'batch':
+        failures = run_batch(args.path_or_url, args)
+        if stop_stream:
+            stop_stream()
+        finish_profile()
+        exit(1 if failures else 0)
+
+    started_at = time.time()
+    try:
+        repo_name, global_summary, tree, commit = summarize_source(args.path_or_url, args.mode, args)
+    except SourceError as e:
+        print(e)
+        finish_profile()
+        exit(1)
+    finally:
+        if stop_stream:
+            stop_stream()
 
     print("\n===== GLOBAL SUMMARY =====\n")
     print(global_summary)
+    save_outputs(repo_name, global_summary, tree, source=args.path_or_url, started_at=started_at, commit=commit)
+    print(f"Summary cache: {summary_cache.hits} hits, {summary_cache.misses} misses")
+    print(dedup_stats.report())
+    finish_profile()
+
 
-    summary_file = os.path.join(EXAMPLE_REPOS_DIR, f"summary_{repo_name}.txt")
-    with open(summary_file, "w", encoding="utf-8") as f:
-        f.write(global_summary)
-    print(f"\nGlobal summary saved to {summary_file}")
-
-    # Also save the flattened summary tree (for subsummaries).
-    flattened = flatten_tree(tree)
-    tree_file = os.path.join(EXAMPLE_REPOS_DIR, f"summary_tree_{repo_name}.json")
-    with open(tree_file, "w", encoding="utf-8") as f:
-        json.dump(flattened, f, indent=2)
-    print(f"Summary tree saved to {tree_file}")
+def finish_profile():
+    """Print the profile summary table and close the trace, if --profile is on."""
+    if profiler.enabled:
+        profiler.stop()
+        print(profiler.report())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
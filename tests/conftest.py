@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.summary_cache import configure_cache
+from functions.dedup import prompt_memo
+
+
+@pytest.fixture(autouse=True)
+def no_summary_cache():
+    """Every test talks to its backend: no persistent cache and no in-process prompt memo."""
+    configure_cache(enabled=False)
+    prompt_memo.clear()
+    yield
+    prompt_memo.clear()
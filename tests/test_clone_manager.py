@@ -0,0 +1,116 @@
+import os
+import subprocess
+
+import pytest
+
+from functions.clone_manager import CloneManager
+
+
+def git(*args, cwd):
+    env = dict(os.environ, GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+               GIT_COMMITTER_NAME="test", GIT_COMMITTER_EMAIL="test@example.com")
+    return subprocess.run(["git", *args], cwd=cwd, env=env, check=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout.decode("utf-8").strip()
+
+
+def make_repo(path, files):
+    os.makedirs(path)
+    git("init", "-q", "-b", "main", cwd=path)
+    commit(path, files)
+    return "file://" + str(path)
+
+
+def commit(path, files):
+    for name, text in files.items():
+        os.makedirs(os.path.dirname(os.path.join(path, name)) or path, exist_ok=True)
+        with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    git("add", "-A", cwd=path)
+    git("commit", "-q", "-m", "update", cwd=path)
+    return git("rev-parse", "HEAD", cwd=path)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return CloneManager(cache_dir=str(tmp_path / "mirrors"))
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_checkout_fetches_new_commits_into_the_same_mirror(tmp_path, manager):
+    url = make_repo(tmp_path / "origin", {"a.py": "v1\n", "pkg/b.py": "b\n"})
+    dest = str(tmp_path / "checkout")
+    manager.checkout(url, dest)
+    assert read(os.path.join(dest, "a.py")) == "v1\n"
+    assert os.path.isdir(manager.mirror_path(url))
+
+    head = commit(tmp_path / "origin", {"a.py": "v2\n"})
+    manager.release(dest)
+    manager.checkout(url, dest)
+    assert read(os.path.join(dest, "a.py")) == "v2\n"
+    assert git("rev-parse", "HEAD", cwd=dest) == head
+    assert os.listdir(manager.cache_dir) == [os.path.basename(manager.mirror_path(url))]
+    assert manager.resolve_rev(url) == head
+
+
+def test_release_removes_the_worktree_and_unregisters_it(tmp_path, manager):
+    url = make_repo(tmp_path / "origin", {"a.py": "x\n"})
+    dest = str(tmp_path / "checkout")
+    manager.checkout(url, dest)
+    manager.release(dest)
+    assert not os.path.exists(dest)
+    assert manager._checkouts == {}
+    assert "checkout" not in git("worktree", "list", cwd=manager.mirror_path(url))
+
+
+def test_files_are_read_from_the_mirror_without_checkout(tmp_path, manager):
+    url = make_repo(tmp_path / "origin", {"a.py": "x\n", "pkg/b.py": "b\n"})
+    manager.update_mirror(url)
+    assert sorted(path for _, path in manager.list_files(url)) == ["a.py", "pkg/b.py"]
+    assert manager.read_blob(url, "pkg/b.py") == b"b\n"
+
+
+def test_eviction_removes_least_recently_used_mirrors_not_in_use(tmp_path, manager):
+    urls = [make_repo(tmp_path / f"origin{i}", {"a.py": f"{i}\n"}) for i in range(3)]
+    for i, url in enumerate(urls):
+        manager.update_mirror(url)
+        # Distinct mtimes: origin0 is the least recently used mirror.
+        os.utime(manager.mirror_path(url), (1000 + i, 1000 + i))
+    in_use = str(tmp_path / "checkout")
+    manager.checkout(urls[0], in_use)
+    os.utime(manager.mirror_path(urls[0]), (1000, 1000))
+
+    manager.max_bytes = 0
+    manager.evict()
+    assert os.path.isdir(manager.mirror_path(urls[0]))
+    assert not os.path.exists(manager.mirror_path(urls[1]))
+    assert not os.path.exists(manager.mirror_path(urls[2]))
+
+    manager.release(in_use)
+    manager.evict()
+    assert os.listdir(manager.cache_dir) == []
+
+
+def test_eviction_keeps_a_mirror_used_after_the_lru_list_was_built(tmp_path, manager, monkeypatch):
+    url = make_repo(tmp_path / "origin", {"a.py": "x\n"})
+    mirror = manager.update_mirror(url)
+    os.utime(mirror, (1000, 1000))
+    manager.max_bytes = 0
+    lock = manager._mirror_lock(mirror)
+
+    class RefreshingLock:
+        """Another worker refreshes the mirror while evict() waits for its lock."""
+
+        def __enter__(self):
+            os.utime(mirror)
+            return lock.__enter__()
+
+        def __exit__(self, *exc):
+            return lock.__exit__(*exc)
+
+    monkeypatch.setattr(manager, "_mirror_lock", lambda _: RefreshingLock())
+    manager.evict()
+    assert os.path.isdir(mirror)
@@ -0,0 +1,68 @@
+import os
+import subprocess
+
+import pytest
+
+from functions.folder_tree import build_folder_tree
+
+# Nested .gitignore files with negations: each deeper file re-includes or re-excludes
+# what the files above it decided, and ignored folders cannot be re-included from inside.
+FILES = {
+    ".gitignore": "*.log\n!keep.log\nbuild/\ndocs/*.md\n!docs/README.md\n/root_only.py\n",
+    "app.py": "",
+    "debug.log": "",
+    "keep.log": "",
+    "root_only.py": "",
+    "build/out.py": "",
+    "docs/README.md": "",
+    "docs/guide.md": "",
+    "docs/api/index.md": "",
+    "sub/.gitignore": "!*.log\nsecret.py\n",
+    "sub/trace.log": "",
+    "sub/secret.py": "",
+    "sub/root_only.py": "",
+    "sub/deep/.gitignore": "*.log\n!important.log\n",
+    "sub/deep/noise.log": "",
+    "sub/deep/important.log": "",
+    "sub/deep/secret.py": "",
+    "sub/deep/build/gen.py": "",
+}
+
+
+def tree_files(tree, root):
+    files = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        rel = os.path.relpath(node.path, root).replace(os.sep, "/")
+        files.update(name if rel == "." else f"{rel}/{name}" for name in node.files)
+        stack.extend(node.subfolders)
+    return files
+
+
+@pytest.fixture
+def repo(tmp_path):
+    for name, text in FILES.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    return str(tmp_path)
+
+
+def git_visible_files(repo):
+    output = subprocess.run(["git", "ls-files", "--others", "--exclude-standard"], cwd=repo, check=True,
+                            stdout=subprocess.PIPE).stdout.decode("utf-8")
+    # Hidden files (the .gitignore files themselves) are always left out of the tree.
+    return {path for path in output.splitlines() if not os.path.basename(path).startswith(".")}
+
+
+@pytest.mark.parametrize("max_workers", [None, 4])
+def test_nested_negations_match_git(repo, max_workers):
+    tree = build_folder_tree(repo, repo, max_workers=max_workers)
+    files = tree_files(tree, repo)
+    assert files == git_visible_files(repo)
+    assert files == {
+        "app.py", "keep.log", "docs/README.md", "docs/api/index.md",
+        "sub/trace.log", "sub/root_only.py", "sub/deep/important.log",
+    }
@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+
+from functions import notebooks
+from functions.notebooks import stream_notebook_source
+
+
+def reference_source(text):
+    """Cell sources extracted from the whole document with json.loads."""
+    cells = []
+    for cell in json.loads(text).get("cells", []):
+        source = cell.get("source", "")
+        source = "".join(source) if isinstance(source, list) else source
+        if cell.get("cell_type") == "code":
+            cells.append(f"```python\n{source}\n```\n")
+        elif cell.get("cell_type") == "markdown":
+            cells.append(source + "\n")
+    return "\n".join(cells)
+
+
+NOTEBOOKS = {
+    "escapes": {
+        "metadata": {"kernelspec": {"name": "python3", "display_name": "Python 3"}},
+        "cells": [
+            {"cell_type": "code", "execution_count": 1, "metadata": {},
+             "source": ["print(\"quoted \\\\ \\\"backslash\\\"\")\n", "path = 'C:\\\\dir\\\\'\n", "tab\there"],
+             "outputs": [{"output_type": "stream", "name": "stdout", "text": ["}]\"{[\n"]}]},
+            {"cell_type": "markdown", "metadata": {}, "source": ["# Caf\u00e9 \u2014 \U0001F600\n", "\\\\end"]},
+        ],
+        "nbformat": 4, "nbformat_minor": 5,
+    },
+    "string_source_and_raw_cells": {
+        "cells": [
+            {"cell_type": "raw", "metadata": {}, "source": "not summarized"},
+            {"cell_type": "code", "metadata": {"tags": ["a]", "{b"]}, "outputs": [], "execution_count": None,
+             "source": "x = {'a': [1, 2]}\ny = \"]}\""},
+            {"metadata": {}, "cell_type": "markdown", "source": []},
+        ],
+        "metadata": {}, "nbformat": 4, "nbformat_minor": 5,
+    },
+    "no_cells": {"metadata": {"cells": ["decoy"]}, "nbformat": 4, "cells": []},
+}
+
+
+@pytest.mark.parametrize("name", sorted(NOTEBOOKS))
+@pytest.mark.parametrize("indent", [None, 1])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+@pytest.mark.parametrize("block_chars", [1, 2, 3, 7, 1024 * 1024])
+def test_stream_matches_json_loads(monkeypatch, name, indent, ensure_ascii, block_chars):
+    # Small read blocks split strings, escapes and surrogate pairs across buffer refills.
+    monkeypatch.setattr(notebooks, "READ_BLOCK_CHARS", block_chars)
+    text = json.dumps(NOTEBOOKS[name], indent=indent, ensure_ascii=ensure_ascii)
+    assert stream_notebook_source(io.StringIO(text)) == reference_source(text)
+
+
+def test_long_cells_are_truncated():
+    text = json.dumps({"cells": [{"cell_type": "code", "metadata": {}, "outputs": [],
+                                  "source": ["a" * 30 + "\n", "b" * 30]}]})
+    source = stream_notebook_source(io.StringIO(text), max_cell_chars=40)
+    assert source.startswith("```python\n" + "a" * 30 + "\n" + "b" * 9 + "\n")
+    assert "about 21 more characters omitted" in source
+
+
+def test_invalid_notebook_raises_value_error():
+    with pytest.raises(ValueError):
+        stream_notebook_source(io.StringIO('{"cells": [{"cell_type": "code", "source": "x'))
@@ -0,0 +1,111 @@
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from functions import genai_summary, async_genai_summary
+from functions.backends import MistralBackend, set_backend
+from functions.async_genai_summary import AsyncSummaryClient
+
+
+class FakeChatServer(ThreadingHTTPServer):
+    """Local stand-in for the chat completions endpoint: replies with 'failures' first, then answers."""
+
+    def __init__(self, failures):
+        super().__init__(("127.0.0.1", 0), _ChatHandler)
+        self.failures = list(failures)
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.requests += 1
+            failure = self.server.failures.pop(0) if self.server.failures else None
+        if failure is not None:
+            status, retry_after = failure
+            headers = [("Retry-After", retry_after)] if retry_after is not None else []
+            self._send(status, {"message": "failure"}, headers)
+            return
+        self._send(200, {
+            "id": "test", "object": "chat.completion", "model": body["model"], "created": 0,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "A summary."}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+        })
+
+
+@pytest.fixture
+def chat_server(request):
+    server = FakeChatServer(request.param)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    set_backend(MistralBackend(api_key="test", server_url=server.url))
+    yield server
+    server.shutdown()
+    server.server_close()
+    set_backend(None)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the retry delays instead of sleeping."""
+    delays = []
+    monkeypatch.setattr(genai_summary.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.mark.parametrize("chat_server", [[(429, "0.25"), (503, "1")]], indirect=True)
+def test_retry_after_seconds_is_honored(chat_server, sleeps):
+    assert genai_summary.generate_summary("retry after seconds") == "A summary."
+    assert chat_server.requests == 3
+    assert sleeps == [0.25, 1.0]
+
+
+@pytest.mark.parametrize("chat_server", [[(429, "Wed, 21 Oct 2015 07:28:00 GMT")]], indirect=True)
+def test_retry_after_date_in_the_past_retries_at_once(chat_server, sleeps):
+    assert genai_summary.generate_summary("retry after date") == "A summary."
+    assert sleeps == [0.0]
+
+
+@pytest.mark.parametrize("chat_server", [[(400, None)]], indirect=True)
+def test_client_errors_are_not_retried(chat_server, sleeps):
+    with pytest.raises(Exception):
+        genai_summary.generate_summary("bad request")
+    assert chat_server.requests == 1
+    assert sleeps == []
+
+
+@pytest.mark.parametrize("chat_server", [[(429, "0.5"), (429, "0.5")]], indirect=True)
+def test_async_client_uses_the_same_retry_policy(chat_server, monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(async_genai_summary.asyncio, "sleep", fake_sleep)
+    client = AsyncSummaryClient()
+    assert asyncio.run(client.generate_summary("async retry")) == "A summary."
+    assert chat_server.requests == 3
+    assert delays == [0.5, 0.5]
+    assert client.retries == 2